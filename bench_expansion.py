@@ -0,0 +1,242 @@
+"""Benchmark the expansion hot path against synthetic dictionaries.
+
+Drives synthetic keystroke streams through ExpansionEngine with a
+RecordingBackend and prints one JSON document with per-key latency
+percentiles, throughput and peak memory for each dictionary size. Typing
+runs on a simulated clock, so debounce checks, buffer expiry and clipboard
+restores fire during pauses and are measured with the key before them:
+
+    python bench_expansion.py --sizes 10,1000,100000,1000000 --output bench.json
+    python bench_expansion.py --baseline bench.json  # exit 1 on p99 regressions
+"""
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+from shortcut_backends import RecordingBackend
+from shortcut_engine import ExpansionEngine, MatchIndex, MatchIndexBuilder
+
+DEFAULT_SIZES = (10, 1000, 100000, 1000000)
+
+# Most triggers are short mnemonics, some carry a prefix character like ";sig"
+TRIGGER_LENGTHS = (2, 3, 4, 5, 6, 7, 8, 10, 12)
+TRIGGER_WEIGHTS = (6, 18, 24, 18, 12, 8, 6, 5, 3)
+TRIGGER_PREFIXES = ("", "", "", ";", "/", ":")
+ALPHABET = string.ascii_lowercase + string.digits
+EXPANSION_POOL_SIZE = 4096
+KEY_INTERVAL = 0.12  # Simulated seconds between keystrokes, shorter than the debounce
+PAUSE = "pause"  # Keystroke stream entry where the typist stops for PAUSE_SECONDS
+PAUSE_SECONDS = 1.0
+
+
+def random_word(rng, length):
+    return "".join(rng.choices(string.ascii_lowercase, k=length))
+
+
+def random_expansion(rng):
+    # Mostly phrases, some paragraphs and the occasional multi-KB signature
+    roll = rng.random()
+    if roll < 0.7:
+        length = rng.randint(10, 80)
+    elif roll < 0.95:
+        length = rng.randint(100, 600)
+    else:
+        length = rng.randint(1000, 3000)
+    words = []
+    total = 0
+    while total < length:
+        words.append(random_word(rng, rng.randint(1, 9)))
+        total += len(words[-1]) + 1
+    return " ".join(words)[:length]
+
+
+def generate_dictionary(size, rng):
+    """Trigger -> expansion dict with realistic trigger and expansion lengths"""
+    # Expansions are drawn from a shared pool so large sizes generate quickly
+    pool = [random_expansion(rng) for _ in range(min(size, EXPANSION_POOL_SIZE))]
+    lengths = rng.choices(TRIGGER_LENGTHS, TRIGGER_WEIGHTS, k=size)
+    expansions = {}
+    attempts = 0
+    while len(expansions) < size:
+        # Short lengths run out of unique triggers at large sizes, so a
+        # collision moves on to the next drawn length instead of retrying
+        length = lengths[attempts % size]
+        attempts += 1
+        trigger = rng.choice(TRIGGER_PREFIXES) + "".join(rng.choices(ALPHABET, k=length))
+        expansions.setdefault(trigger, rng.choice(pool))
+    return expansions
+
+
+def generate_keystrokes(triggers, count, rng, trigger_rate=0.1, typo_rate=0.02, pause_rate=0.05,
+                        trigger_pause_rate=0.5):
+    """Key names as the hook reports them: prose words, triggers, typos and spaces
+
+    PAUSE entries mark where the typist stops long enough for the debounced
+    check; half of all triggers are expanded that way instead of by space.
+    """
+    keys = []
+    while len(keys) < count:
+        if triggers and rng.random() < trigger_rate:
+            word = rng.choice(triggers)
+            pause = rng.random() < trigger_pause_rate
+        else:
+            word = random_word(rng, rng.randint(1, 10))
+            pause = rng.random() < pause_rate
+        for char in word:
+            keys.append(char)
+            if rng.random() < typo_rate:
+                keys.append(rng.choice(string.ascii_lowercase))
+                keys.append("backspace")
+        if pause:
+            keys.append(PAUSE)
+        keys.append("space")
+    return keys[:count]
+
+
+class SimulatedScheduler:
+    """Stands in for the engine's Scheduler with a clock the benchmark advances"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._timers = {}  # Key -> (deadline, callback)
+
+    def schedule(self, key, delay, callback):
+        self._timers[key] = (self.now + delay, callback)
+
+    def cancel(self, key):
+        self._timers.pop(key, None)
+
+    def stop(self):
+        self._timers.clear()
+
+    def advance(self, seconds):
+        """Move the clock on and run every deadline that came due, earliest first"""
+        self.now += seconds
+        due = sorted((deadline, key) for key, (deadline, _) in self._timers.items() if deadline <= self.now)
+        for _, key in due:
+            _, callback = self._timers.pop(key)
+            callback()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_size(size, key_count, seed):
+    rng = random.Random(seed + size)
+    expansions = generate_dictionary(size, rng)
+    keys = generate_keystrokes(list(expansions), key_count, rng)
+
+    # Memory is traced only while the index is built, tracing would skew latencies
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = MatchIndex(1, expansions)
+    build_time = time.perf_counter() - started
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    index_builder = MatchIndexBuilder()
+    index_builder.current = index
+    backend = RecordingBackend()
+    scheduler = SimulatedScheduler()
+    engine = ExpansionEngine(index_builder, backend, scheduler=scheduler)
+
+    # Deadlines post their actions to the engine queue; each key's sample also
+    # covers the actions that came due before the next key, as on the engine thread
+    latencies = []
+    clock = time.perf_counter
+    process = engine.process
+    drain = engine.events.drain
+    run_started = clock()
+    for key in keys:
+        key_started = clock()
+        if key == PAUSE:
+            scheduler.advance(PAUSE_SECONDS)
+        else:
+            process(key_started, key)
+            scheduler.advance(KEY_INTERVAL)
+        for item in drain(0):
+            process(*item)
+        latencies.append(clock() - key_started)
+    run_time = clock() - run_started
+    engine.stop()
+
+    expanded = sum(1 for _, action, _ in backend.events if action in ("write", "paste"))
+    latencies.sort()
+    return {
+        "triggers": size,
+        "automaton_states": index.automaton.size,
+        "index_build_s": round(build_time, 4),
+        "index_peak_memory_mb": round(peak_memory / 1e6, 2),
+        "keys": len(keys) - keys.count(PAUSE),
+        "pauses": keys.count(PAUSE),
+        "expansions": expanded,
+        "keys_per_s": round(len(keys) / run_time, 1),
+        "expansions_per_s": round(expanded / run_time, 1),
+        "key_latency_us": {
+            "p50": round(percentile(latencies, 0.5) * 1e6, 2),
+            "p99": round(percentile(latencies, 0.99) * 1e6, 2),
+            "p999": round(percentile(latencies, 0.999) * 1e6, 2),
+            "max": round(latencies[-1] * 1e6, 2),
+        },
+        "engine_metrics": engine.metrics.report(),
+    }
+
+
+def find_regressions(report, baseline, tolerance):
+    previous = {result["triggers"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(result["triggers"])
+        if before is None:
+            continue
+        for metric in ("p50", "p99", "p999"):
+            old, new = before["key_latency_us"][metric], result["key_latency_us"][metric]
+            if old and new > old * (1 + tolerance):
+                regressions.append(f"{result['triggers']} triggers: {metric} {old} -> {new} us")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated dictionary sizes")
+    parser.add_argument("--keys", type=int, default=20000, help="keystrokes per dictionary size")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed latency growth over the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "keys_per_size": args.keys,
+        "results": [run_size(int(size), args.keys, args.seed) for size in args.sizes.split(",")],
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
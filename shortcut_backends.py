@@ -0,0 +1,149 @@
+import os
+import time
+
+# The real backend needs a desktop session; keep this module importable
+# without one so the engine can run against RecordingBackend anywhere
+try:
+    import keyboard
+except ImportError:
+    keyboard = None
+
+try:
+    import pyperclip
+except ImportError:
+    pyperclip = None
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+
+class ClipboardUnavailable(Exception):
+    """Raised when the backend cannot read or write the clipboard"""
+
+
+class OutputBackend:
+    """Where synthesized keystrokes, clipboard pastes and sounds are sent"""
+
+    echoes_input = False  # True when synthesized keys come back through the keyboard hook
+
+    def backspace(self, count):
+        raise NotImplementedError
+
+    def write(self, text):
+        raise NotImplementedError
+
+    def paste(self):
+        raise NotImplementedError
+
+    def move_left(self, count):
+        raise NotImplementedError
+
+    def get_clipboard(self):
+        raise NotImplementedError
+
+    def set_clipboard(self, text):
+        raise NotImplementedError
+
+    def play_file(self, sound_file):
+        raise NotImplementedError
+
+    def play_default_sound(self):
+        raise NotImplementedError
+
+    def play_sound(self, sound_file=""):
+        """Play sound_file if it exists, otherwise (or on failure) the system sound"""
+        if sound_file and os.path.exists(sound_file):
+            try:
+                self.play_file(sound_file)
+                return
+            except Exception as e:
+                print(f"Error playing custom sound: {e}")
+        try:
+            self.play_default_sound()
+        except Exception as e:
+            print(f"Error playing system sound: {e}")
+
+
+class KeyboardBackend(OutputBackend):
+    """Real output through the keyboard, pyperclip and winsound modules"""
+
+    echoes_input = True
+
+    def backspace(self, count):
+        for _ in range(count):
+            keyboard.press_and_release('backspace')
+            time.sleep(0.01)
+
+    def write(self, text):
+        keyboard.write(text)
+
+    def paste(self):
+        keyboard.send('ctrl+v')
+
+    def move_left(self, count):
+        for _ in range(count):
+            keyboard.press_and_release('left')
+            time.sleep(0.01)
+
+    def get_clipboard(self):
+        if pyperclip is None:
+            raise ClipboardUnavailable("pyperclip is not installed")
+        try:
+            return pyperclip.paste()
+        except pyperclip.PyperclipException as e:
+            raise ClipboardUnavailable(e)
+
+    def set_clipboard(self, text):
+        if pyperclip is None:
+            raise ClipboardUnavailable("pyperclip is not installed")
+        try:
+            pyperclip.copy(text)
+        except pyperclip.PyperclipException as e:
+            raise ClipboardUnavailable(e)
+
+    def play_file(self, sound_file):
+        winsound.PlaySound(sound_file, winsound.SND_FILENAME | winsound.SND_ASYNC)
+
+    def play_default_sound(self):
+        winsound.PlaySound("SystemExclamation", winsound.SND_ALIAS | winsound.SND_ASYNC)
+
+
+class RecordingBackend(OutputBackend):
+    """In-memory backend that logs every action with a monotonic timestamp"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.clipboard = ""
+        self.events = []  # (timestamp, action, payload)
+
+    def _record(self, action, payload=None):
+        self.events.append((self.clock(), action, payload))
+
+    def clear(self):
+        self.events.clear()
+
+    def backspace(self, count):
+        self._record("backspace", count)
+
+    def write(self, text):
+        self._record("write", text)
+
+    def paste(self):
+        self._record("paste", self.clipboard)
+
+    def move_left(self, count):
+        self._record("left", count)
+
+    def get_clipboard(self):
+        return self.clipboard
+
+    def set_clipboard(self, text):
+        self.clipboard = text
+
+    def play_file(self, sound_file):
+        self._record("sound", sound_file)
+
+    def play_default_sound(self):
+        self._record("sound", None)
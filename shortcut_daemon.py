@@ -0,0 +1,185 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from shortcut_backends import KeyboardBackend, keyboard
+from shortcut_engine import ExpansionEngine, MatchIndexBuilder
+from shortcut_references import ReferenceGraph
+from shortcut_server import SOCKET_PATH, ShortcutServer
+from shortcut_store import StoreFollower
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Startup milestones (hook armed, index ready) are measured from here
+STARTED_AT = time.perf_counter()
+# Held by whichever process owns the keyboard hook, the daemon or a standalone
+# window; a window that finds it taken attaches instead
+LOCK_FILE = "shortcut_expander.lock"
+POLL_INTERVAL = 1.0  # Seconds between checks for edits made by the window
+# When set, latency metrics are written to this file on exit
+METRICS_FILE = os.environ.get("SHORTCUT_EXPANDER_METRICS")
+
+
+class InstanceLock:
+    """Exclusive lock on a file; the OS releases it if the holder dies"""
+
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self.file = None
+
+    def acquire(self, timeout=0.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            f = open(self.path, "a+")
+            try:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                elif msvcrt:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                self.file = f
+                return True
+            except OSError:
+                f.close()
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.05)
+
+    def release(self):
+        if self.file is not None:
+            self.file.close()  # Closing drops the lock on every platform
+            self.file = None
+
+
+def daemon_running():
+    """True while another process holds the lock, i.e. owns the keyboard hook"""
+    lock = InstanceLock()
+    if lock.acquire():
+        lock.release()
+        return False
+    return True
+
+
+def launch_daemon(timeout=5.0):
+    """Start the daemon as a detached process; True once it holds the lock"""
+    if os.name == "nt":
+        options = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        options = {"start_new_session": True}  # Outlives the window that started it
+    try:
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, **options)
+    except OSError as e:
+        print(f"Error launching daemon: {e}")
+        return False
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        if daemon_running():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+class ExpanderDaemon:
+    """The expansion engine and keyboard hook without any UI
+
+    Shortcuts and settings come from a read-only copy of the store that is
+    polled for the window's edits, so the window never has to talk to us.
+    """
+
+    def __init__(self, backend=None):
+        self.store = StoreFollower()
+        self.backend = backend or KeyboardBackend()
+        self.index_builder = MatchIndexBuilder(on_built=lambda index: self.mark_startup("index"))
+        data = self.store.data
+        self.references = ReferenceGraph(
+            {shortcut: details["expansion"] for shortcut, details in data["shortcuts"].items()}
+        )
+        self.engine = ExpansionEngine(self.index_builder, self.backend, data.get("buffer_clear_time", 10000),
+                                      data.get("paste_threshold", 200), data.get("sound_file", ""))
+        self.server = ShortcutServer(self.index_builder, self.engine.templates) if SOCKET_PATH else None
+        self.lock = InstanceLock()
+        self.stopped = threading.Event()
+        self.hook = None
+
+    def mark_startup(self, milestone):
+        self.engine.metrics.mark(milestone, time.perf_counter() - STARTED_AT)
+
+    def rebuild_index(self):
+        self.index_builder.request_rebuild(self.references.flattened())
+
+    def apply_settings(self):
+        data = self.store.data
+        self.engine.buffer_clear_time = data.get("buffer_clear_time", 10000)
+        self.engine.injector.paste_threshold = data.get("paste_threshold", 200)
+        self.engine.sound_file = data.get("sound_file", "")
+
+    def follow_store(self):
+        changes = self.store.poll()
+        if changes is None:
+            return
+        if changes.shortcuts_changed:
+            self.references.apply(changes, self.store.data["shortcuts"])
+            self.rebuild_index()
+        if self.server and (changes.shortcuts_changed or changes.groups):
+            self.server.groups = self.store.group_snapshot()
+        if changes.reset or changes.settings:
+            self.apply_settings()
+
+    def stop(self, *args):
+        self.stopped.set()
+
+    def run(self):
+        if not self.lock.acquire(timeout=1.0):
+            print("Another shortcut expander (daemon or window) already owns the keyboard hook")
+            return 1
+        try:
+            self.rebuild_index()
+            self.engine.start()
+            self.hook = keyboard.on_press(self.engine.on_key_press)
+            self.mark_startup("hook")
+            if self.server:
+                self.server.groups = self.store.group_snapshot()
+                self.server.start()
+            while not self.stopped.wait(POLL_INTERVAL):
+                try:
+                    self.follow_store()
+                except Exception as e:
+                    print(f"Error reloading shortcuts: {e}")
+        finally:
+            if self.hook is not None:
+                keyboard.unhook(self.hook)
+            if self.server:
+                self.server.stop()
+            self.engine.stop()
+            if METRICS_FILE:
+                self.engine.metrics.dump(METRICS_FILE)
+            self.lock.release()
+        return 0
+
+
+def main():
+    if keyboard is None:
+        print("The keyboard module is required to run the daemon")
+        return 1
+    daemon = ExpanderDaemon()
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    return daemon.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
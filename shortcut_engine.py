@@ -0,0 +1,548 @@
+import bisect
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from shortcut_backends import ClipboardUnavailable, KeyboardBackend
+from shortcut_metrics import Metrics
+from shortcut_template import TemplateCache, TemplateContext, render
+
+# Triggers only match at the start of the buffer or right after a space, so the
+# automaton treats a space as the word boundary: every trigger is compiled as
+# " " + trigger and every fresh buffer starts by feeding a single space.
+BOUNDARY = " "
+
+
+class ShortcutAutomaton:
+    """Aho-Corasick automaton over all triggers, anchored at word boundaries"""
+
+    def __init__(self, triggers=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._match = [None]
+
+        for trigger in triggers:
+            if trigger:
+                self._add(BOUNDARY + trigger, trigger)
+        self._link()
+
+        self.start_state = self.step(0, BOUNDARY)
+        self.size = len(self._goto)
+
+    def _add(self, pattern, trigger):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._match.append(None)
+            state = next_state
+        self._match[state] = trigger
+
+    def _link(self):
+        # Breadth-first so every fail target is finished before its dependents.
+        # A state's match is its own trigger if it has one, otherwise the match
+        # of its fail state - which is always the longest trigger ending here.
+        goto, fail, match = self._goto, self._fail, self._match
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(char, 0)
+                if match[child] is None:
+                    match[child] = match[fail[child]]
+
+    def step(self, state, char):
+        """Advance one character; amortized O(1) regardless of trigger count"""
+        goto, fail = self._goto, self._fail
+        while state and char not in goto[state]:
+            state = fail[state]
+        return goto[state].get(char, 0)
+
+    def match(self, state):
+        """Longest trigger that ends at this state on a word boundary"""
+        return self._match[state]
+
+
+class MatchCursor:
+    """Carries automaton state between keystrokes, one state per typed character"""
+
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.chars = []
+        self._states = [automaton.start_state]
+
+    @property
+    def text(self):
+        return "".join(self.chars)
+
+    def feed(self, char):
+        self.chars.append(char)
+        self._states.append(self.automaton.step(self._states[-1], char))
+
+    def backspace(self):
+        if self.chars:
+            self.chars.pop()
+            self._states.pop()
+
+    def reset(self):
+        self.chars.clear()
+        del self._states[1:]
+
+    def match(self):
+        return self.automaton.match(self._states[-1])
+
+    def rebind(self, automaton):
+        """Switch to a rebuilt automaton, replaying the current buffer into it"""
+        chars = self.chars
+        self.automaton = automaton
+        self.chars = []
+        self._states = [automaton.start_state]
+        for char in chars:
+            self.feed(char)
+
+
+class MatchIndex:
+    """Immutable, generation-numbered snapshot of triggers and their expansions"""
+
+    def __init__(self, generation, expansions, build_time=0.0):
+        self.generation = generation
+        self.expansions = expansions  # Trigger -> str or Template; never mutated once published
+        self.automaton = ShortcutAutomaton(expansions)
+        self.build_time = build_time
+        self._sorted = None  # Sorted triggers, built on the first prefix query
+
+    def __len__(self):
+        return len(self.expansions)
+
+    def lookup(self, trigger):
+        return self.expansions.get(trigger)
+
+    def complete(self, prefix, limit=50):
+        """Up to limit triggers starting with prefix, in sorted order"""
+        triggers = self._sorted
+        if triggers is None:
+            # Racing readers may both sort; either list is the same
+            triggers = self._sorted = sorted(self.expansions)
+        start = bisect.bisect_left(triggers, prefix)
+        matches = []
+        for trigger in triggers[start:start + limit]:
+            if not trigger.startswith(prefix):
+                break
+            matches.append(trigger)
+        return matches
+
+
+class MatchIndexBuilder:
+    """Builds the next index generation off the keystroke path and swaps it in"""
+
+    def __init__(self, on_built=None):
+        # Readers only ever dereference self.current once, so publishing a new
+        # generation is a single reference assignment and never blocks them
+        self.current = MatchIndex(0, {})
+        self.on_built = on_built  # Called on the builder thread with each new index
+        self.templates = TemplateCache()  # Only the builder thread touches it
+        self._pending = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="match-index-builder", daemon=True)
+        self._thread.start()
+
+    def request_rebuild(self, expansions):
+        """Queue a rebuild from a trigger -> expansion dict the builder now owns"""
+        with self._condition:
+            # Only the newest request matters; bursts of edits collapse into one build
+            self._pending = expansions
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                expansions, self._pending = self._pending, None
+
+            started = time.perf_counter()
+            try:
+                index = MatchIndex(self.current.generation + 1, self.templates.compile_all(expansions))
+            except Exception as e:
+                print(f"Error building match index: {e}")
+                continue
+            index.build_time = time.perf_counter() - started
+            self.current = index
+            if self.on_built:
+                self.on_built(index)
+
+
+class Scheduler:
+    """A single long-lived thread that owns named deadlines, rescheduled in place"""
+
+    def __init__(self, name="scheduler"):
+        # Heap of [wake_time, seq, key] with at most one entry per key; the real
+        # deadline lives in self._timers so pushing a deadline back is O(1)
+        self._heap = []
+        self._timers = {}
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._timers)
+
+    def schedule(self, key, delay, callback):
+        """Run callback after delay seconds, replacing any pending deadline for key"""
+        deadline = time.monotonic() + delay
+        with self._condition:
+            timer = self._timers.get(key)
+            if timer is None:
+                heapq.heappush(self._heap, [deadline, next(self._seq), key])
+            elif deadline < timer[0]:
+                # Moving a deadline earlier must reorder the heap; later is lazy
+                for entry in self._heap:
+                    if entry[2] == key:
+                        entry[0] = deadline
+                heapq.heapify(self._heap)
+            self._timers[key] = (deadline, callback)
+            if self._heap[0][2] == key:
+                self._condition.notify()
+
+    def cancel(self, key):
+        with self._condition:
+            if self._timers.pop(key, None) is not None:
+                self._heap = [entry for entry in self._heap if entry[2] != key]
+                heapq.heapify(self._heap)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                callback = None
+                while self._running and callback is None:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    entry = self._heap[0]
+                    deadline, due_callback = self._timers[entry[2]]
+                    now = time.monotonic()
+                    if deadline <= now:
+                        heapq.heappop(self._heap)
+                        del self._timers[entry[2]]
+                        callback = due_callback
+                    elif entry[0] < deadline:
+                        # Rescheduled since it was queued; sift it to its new slot
+                        entry[0] = deadline
+                        heapq.heapreplace(self._heap, entry)
+                    else:
+                        self._condition.wait(deadline - now)
+                if not self._running:
+                    return
+
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in scheduled callback: {e}")
+
+
+class EventQueue:
+    """Bounded multi-producer, single-consumer queue that never blocks producers"""
+
+    def __init__(self, capacity=1024):
+        # deque.append/popleft are atomic, so producers never take a lock; the
+        # Event only wakes the consumer when it is idle
+        self.capacity = capacity
+        self.dropped = 0
+        self.high_water = 0
+        self._items = deque()
+        self._ready = threading.Event()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item, force=False):
+        """Enqueue item; returns False and counts an overflow when full"""
+        size = len(self._items)
+        if size >= self.capacity and not force:
+            self.dropped += 1
+            return False
+        self._items.append(item)
+        if size >= self.high_water:
+            self.high_water = size + 1
+        self._ready.set()
+        return True
+
+    def drain(self, timeout=None):
+        """Wait for items, then yield everything queued so far"""
+        self._ready.wait(timeout)
+        self._ready.clear()
+        items = self._items
+        while items:
+            yield items.popleft()
+
+
+class TypingInjector:
+    """Deletes the trigger and types the expansion one synthetic key at a time"""
+
+    def __init__(self, backend, metrics):
+        self.backend = backend
+        self.metrics = metrics
+
+    def remove_trigger(self, trigger):
+        # Remove only the shortcut characters
+        started = time.perf_counter()
+        self.backend.backspace(len(trigger))
+        self.metrics.record("backspace", time.perf_counter() - started)
+
+    def inject(self, trigger, expansion):
+        self.remove_trigger(trigger)
+        started = time.perf_counter()
+        self.backend.write(expansion)
+        self.metrics.record("write", time.perf_counter() - started)
+
+
+class ClipboardInjector(TypingInjector):
+    """Pastes the expansion in one operation and restores the clipboard afterwards"""
+
+    RESTORE_DELAY = 0.3  # Seconds to let the target application read the clipboard
+
+    def __init__(self, backend, metrics, scheduler, post=None):
+        super().__init__(backend, metrics)
+        self.scheduler = scheduler
+        self._saved = None
+        # The restore must run on the thread that injects, never between
+        # setting the clipboard and pasting it; post hands it over there
+        self._post_restore = (lambda: post(self.restore)) if post else self.restore
+
+    def inject(self, trigger, expansion):
+        # Back-to-back pastes must keep the user's clipboard, not our last expansion
+        if self._saved is None:
+            self._saved = self.backend.get_clipboard()
+        self.backend.set_clipboard(expansion)
+
+        self.remove_trigger(trigger)
+        started = time.perf_counter()
+        self.backend.paste()
+        self.metrics.record("write", time.perf_counter() - started)
+        self.scheduler.schedule("clipboard-restore", self.RESTORE_DELAY, self._post_restore)
+
+    def user_clipboard(self):
+        """The user's clipboard, even while one of our pastes is still on it"""
+        if self._saved is not None:
+            return self._saved
+        return self.backend.get_clipboard()
+
+    def restore(self):
+        saved, self._saved = self._saved, None
+        if saved is not None:
+            try:
+                self.backend.set_clipboard(saved)
+            except ClipboardUnavailable as e:
+                print(f"Error restoring clipboard: {e}")
+
+
+class InjectionStrategy:
+    """Chooses between typing and pasting each expansion by its length"""
+
+    def __init__(self, backend, metrics, scheduler, paste_threshold=200, post=None):
+        self.paste_threshold = paste_threshold  # 0 disables pasting
+        self.typing = TypingInjector(backend, metrics)
+        self.clipboard = ClipboardInjector(backend, metrics, scheduler, post)
+
+    def choose(self, expansion):
+        if self.paste_threshold and len(expansion) >= self.paste_threshold:
+            return self.clipboard
+        return self.typing
+
+    def inject(self, trigger, expansion):
+        injector = self.choose(expansion)
+        try:
+            injector.inject(trigger, expansion)
+        except ClipboardUnavailable as e:
+            # No usable clipboard; fall back to typing (the trigger is still there)
+            print(f"Clipboard unavailable, typing expansion instead: {e}")
+            self.typing.inject(trigger, expansion)
+
+
+class ExpansionEngine:
+    """Owns the typing buffer and runs matching and injection on one thread"""
+
+    MODIFIER_KEYS = ('shift', 'ctrl', 'alt', 'windows', 'tab')
+    DEBOUNCE = 0.3  # Seconds of idle typing before the buffer is checked
+    INJECTION_ECHO = 0.05  # Seconds after injecting during which our own key echoes are ignored
+
+    def __init__(self, index_builder, backend=None, buffer_clear_time=10000, paste_threshold=200,
+                 sound_file="", queue_size=1024, metrics=None, debug=False,
+                 scheduler=None):
+        self.index_builder = index_builder
+        self.backend = backend or KeyboardBackend()
+        self.metrics = metrics or Metrics()
+        self.debug = debug  # Per-key tracing to stdout; never enable while typing secrets
+        self.buffer_clear_time = buffer_clear_time
+        self.sound_file = sound_file  # Empty plays the system sound
+        self.events = EventQueue(queue_size)
+        self.scheduler = scheduler or Scheduler()
+        self.injector = InjectionStrategy(self.backend, self.metrics, self.scheduler, paste_threshold,
+                                          post=self._post)
+        self.templates = TemplateContext(self.injector.clipboard.user_clipboard)  # For placeholders
+        self.matcher = MatchCursor(index_builder.current.automaton)
+        self._dropped_seen = 0
+        self._last_key_time = 0.0
+        self._muted_until = 0.0
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name="expansion-engine", daemon=True)
+
+        # Deadlines fire on the scheduler thread but run here, next to the buffer
+        self._post_check = lambda: self._post(self._debounced_check)
+        self._post_clear = lambda: self._post(self.clear_typed_buffer)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self.scheduler.stop()
+        self.events.put(None, force=True)
+
+    def on_key_press(self, event):
+        """keyboard hook callback: timestamp and enqueue, nothing else"""
+        timestamp = time.perf_counter()
+        self.events.put((timestamp, event.name))
+        self.metrics.record("hook", time.perf_counter() - timestamp)
+
+    def _post(self, action):
+        self.events.put((time.perf_counter(), action), force=True)
+
+    def _run(self):
+        while self._running:
+            for item in self.events.drain():
+                if item is None:
+                    return
+                try:
+                    self.process(*item)
+                except Exception as e:
+                    print(f"Error in expansion engine: {e}")
+
+    def process(self, timestamp, name):
+        """Handle one queued key name or deadline action"""
+        if callable(name):
+            name()
+            return
+
+        self.metrics.record("queue", time.perf_counter() - timestamp)
+        self.metrics.count("keys")
+
+        # Keystrokes were lost to an overflow; the buffer no longer reflects
+        # what was typed, so start over instead of risking a false match
+        if self.events.dropped != self._dropped_seen:
+            self._dropped_seen = self.events.dropped
+            self.matcher.reset()
+
+        if timestamp < self._muted_until or name in self.MODIFIER_KEYS:
+            return
+
+        self._last_key_time = timestamp
+        self.current_index()
+        if self.debug:
+            print(f"Key pressed: {name}, Buffer: {self.matcher.text}")
+
+        if name == 'space' or name == 'enter':
+            if self.matcher.chars:
+                self.check_for_shortcut(force_check=True)
+            self.matcher.reset()
+            self.scheduler.cancel("check")
+        elif name == 'backspace':
+            self.matcher.backspace()
+        elif len(name) == 1:  # Only single characters
+            # Advance the automaton by one character; matching is O(1) per key
+            self.matcher.feed(name)
+
+            # Push back the shortcut check; rescheduling replaces the old deadline
+            self.scheduler.schedule("check", self.DEBOUNCE, self._post_check)
+
+            # Clear the buffer once typing has been idle for the user setting
+            self.scheduler.schedule("clear-buffer", self.buffer_clear_time / 1000, self._post_clear)
+
+    def current_index(self):
+        """Latest published index, with the typing cursor moved onto it if it changed"""
+        index = self.index_builder.current
+        if self.matcher.automaton is not index.automaton:
+            self.matcher.rebind(index.automaton)
+        return index
+
+    def clear_typed_buffer(self):
+        """Clear the typing buffer after delay"""
+        if self.matcher.chars:
+            if self.debug:
+                print(f"Clearing buffer: {self.matcher.text}")
+            self.matcher.reset()
+
+    def _debounced_check(self):
+        self.metrics.record("debounce", time.perf_counter() - self._last_key_time)
+        self.check_for_shortcut()
+
+    def check_for_shortcut(self, force_check=False):
+        """Expand the longest trigger at the end of the buffer, if any"""
+        if not self.matcher.chars:
+            return False
+
+        if self.debug:
+            print(f"Checking text: '{self.matcher.text}'")
+        self.metrics.count("checks")
+
+        # The automaton already tracks the longest trigger ending at the
+        # start of the buffer or right after a space
+        started = time.perf_counter()
+        index = self.current_index()
+        shortcut = self.matcher.match()
+        expansion = index.lookup(shortcut) if shortcut else None
+        self.metrics.record("match", time.perf_counter() - started)
+        if expansion is None:
+            # Clear buffer if forced
+            if force_check:
+                self.matcher.reset()
+            return False
+
+        if self.debug:
+            print(f"Match found! Shortcut: '{shortcut}'")
+        try:
+            # Templates were compiled with the index; filling them in is one pass over their parts
+            if expansion.__class__ is not str:
+                started = time.perf_counter()
+                expansion, cursor_back = render(expansion, self.templates)
+                self.metrics.record("render", time.perf_counter() - started)
+            else:
+                cursor_back = 0
+            # Long expansions are pasted in one go, short ones typed
+            self.injector.inject(shortcut, expansion)
+            if cursor_back:
+                self.backend.move_left(cursor_back)  # Leave the caret on the {cursor} marker
+        except Exception as e:
+            print(f"Error during expansion: {e}")
+            return False
+        finally:
+            # The injected keys come back through the hook; don't feed them to the matcher
+            if self.backend.echoes_input:
+                self._muted_until = time.perf_counter() + self.INJECTION_ECHO
+            self.matcher.reset()
+
+        self.backend.play_sound(self.sound_file)
+        self.metrics.count("expansions")
+        self.metrics.record("expansion", time.perf_counter() - self._last_key_time)
+
+        if self.debug:
+            print("Expansion completed successfully")
+        return True
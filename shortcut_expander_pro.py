@@ -1,96 +1,106 @@
+import sys
+
+# The headless daemon must start without importing Tk
+if __name__ == "__main__" and "--daemon" in sys.argv:
+    import shortcut_daemon
+    sys.exit(shortcut_daemon.main())
+
 import tkinter as tk
 from tkinter import dnd
 import tkinter.messagebox as messagebox
 from tkinter import ttk, filedialog
 import keyboard
 import json
+import queue
 import threading
 import time
 import os
-import pyperclip
-import winsound
+from shortcut_backends import KeyboardBackend
+from shortcut_daemon import InstanceLock, daemon_running, launch_daemon
+from shortcut_engine import ExpansionEngine, MatchIndexBuilder
+from shortcut_import import MERGE_KEEP_LOCAL, POLICIES, READERS, ImportJob, reader_for
+from shortcut_listview import VirtualListbox
+from shortcut_references import ReferenceGraph
+from shortcut_search import SearchIndex, scan, search_terms
+from shortcut_server import SOCKET_PATH, ShortcutServer
+from shortcut_store import ChangeSet, SqliteStore, migrate_to_sqlite, open_store
+from shortcut_template import TemplateContext, preview
+from shortcut_theme import THEMES, ThemeRegistry
+from shortcut_watchdog import StallWatchdog
+
+# Startup milestones (hook armed, index ready, window ready) are measured from here
+STARTED_AT = time.perf_counter()
+# Per-key tracing prints typed text to the console, so it is strictly opt-in
+DEBUG = os.environ.get("SHORTCUT_EXPANDER_DEBUG") == "1"
+# When set, latency metrics are written to this file on exit
+METRICS_FILE = os.environ.get("SHORTCUT_EXPANDER_METRICS")
+# When set, Tk callbacks slower than this many ms (e.g. 16 or 50) are reported
+WATCHDOG_BUDGET_MS = os.environ.get("SHORTCUT_EXPANDER_WATCHDOG")
+DATA_FILE = "shortcuts.json"
+DB_FILE = "shortcuts.db"
 
 class ShortcutManager:
     def __init__(self):
         self.current_group = None  # Store current group selection
-        
-        # Define complete theme colors before anything else
-        self.themes = {
-            "bitunix": {
-                "bg": "#F2F2F7",
-                "fg": "#000000",
-                "accent": "#b9f641",
-                "button_bg": "#b9f641",
-                "button_fg": "#000000",
-                "field_bg": "#FFFFFF",
-                "select_bg": "#b9f641",
-                "select_fg": "#000000"
-            },
-            "light": {
-                "bg": "#F2F2F7",
-                "fg": "#000000",
-                "accent": "#007AFF",
-                "button_bg": "#007AFF",
-                "button_fg": "#FFFFFF",
-                "field_bg": "#FFFFFF",
-                "select_bg": "#007AFF",
-                "select_fg": "#FFFFFF"
-            },
-            "dark": {
-                "bg": "#1C1C1E",
-                "fg": "#FFFFFF",
-                "accent": "#0A84FF",
-                "button_bg": "#333333",
-                "button_fg": "#FFFFFF",
-                "field_bg": "#333333",
-                "select_bg": "#0A84FF",
-                "select_fg": "#FFFFFF"
-            },
-            "nord": {
-                "bg": "#2E3440",
-                "fg": "#ECEFF4",
-                "accent": "#88C0D0",
-                "button_bg": "#5E81AC",
-                "button_fg": "#ECEFF4",
-                "field_bg": "#3B4252",
-                "select_bg": "#88C0D0",
-                "select_fg": "#2E3440"
-            },
-            "monokai": {
-                "bg": "#272822",
-                "fg": "#F8F8F2",
-                "accent": "#FD971F",
-                "button_bg": "#66D9EF",
-                "button_fg": "#272822",
-                "field_bg": "#3E3D32",
-                "select_bg": "#FD971F",
-                "select_fg": "#272822"
-            },
-            "solarized": {
-                "bg": "#002B36",
-                "fg": "#839496",
-                "accent": "#268BD2",
-                "button_bg": "#268BD2",
-                "button_fg": "#FDF6E3",
-                "field_bg": "#073642",
-                "select_bg": "#268BD2",
-                "select_fg": "#FDF6E3"
-            }
-        }
-
-        self.data = self.load_data()
+
+        # All edits go through the store, which persists them to JSON or SQLite
+        self.store = open_store(DATA_FILE, DB_FILE)
+        self.data = self.store.data
         self.current_theme = self.data.get("theme", "bitunix")
         self.sound_file = self.data.get("sound_file", "")
         self.buffer_clear_time = self.data.get("buffer_clear_time", 10000)  # Default 10000ms
+        self.paste_threshold = self.data.get("paste_threshold", 200)  # Paste expansions this long or longer
+        # Expansions embedding other shortcuts are flattened here, before the index sees them
+        self.references = ReferenceGraph(
+            {shortcut: details["expansion"] for shortcut, details in self.data["shortcuts"].items()}
+        )
+
+        # --- Typing Monitoring ---
+        # The engine and hook come up before any Tk work, so expansions work
+        # while the window is still being built.
+        # Background threads never touch Tk directly; they post callbacks here
+        self.ui_queue = queue.SimpleQueue()
+        self.backend = KeyboardBackend()
+        # With a daemon running (or started by --with-daemon) it owns the hook
+        # and follows our edits on disk; the window then only edits the store.
+        # Otherwise the window holds the lock for as long as it has the hook,
+        # so a daemon started later refuses to arm a second one
+        if "--with-daemon" in sys.argv and not daemon_running():
+            launch_daemon()
+        self.lock = InstanceLock()
+        self.attached = not self.lock.acquire()
+        self.index_builder = None
+        self.engine = None
+        self.server = None
+        if not self.attached:
+            self.index_builder = MatchIndexBuilder(on_built=lambda index: self.mark_startup("index"))
+            self.engine = ExpansionEngine(self.index_builder, self.backend, self.buffer_clear_time,
+                                          self.paste_threshold, self.sound_file, debug=DEBUG)
+            self.rebuild_index()
+            self.engine.start()
+            # Attached windows leave the socket API to the daemon, which has the index
+            if SOCKET_PATH:
+                self.server = ShortcutServer(self.index_builder, self.engine.templates)
+                self.server.groups = self.store.group_snapshot()
+                self.server.start()
+
+            # --- Hotkey Thread ---
+            self.hotkey_thread = threading.Thread(target=self.register_hotkey, daemon=True)
+            self.hotkey_thread.start()
+
+        # The stall watchdog wraps Tk callbacks as they are registered, so it goes first
+        self.watchdog = None
+        if WATCHDOG_BUDGET_MS:
+            try:
+                self.watchdog = StallWatchdog(float(WATCHDOG_BUDGET_MS)).install()
+            except ValueError:
+                print(f"Error: SHORTCUT_EXPANDER_WATCHDOG must be a number of ms, not {WATCHDOG_BUDGET_MS!r}")
 
         self.root = tk.Tk()
         self.root.title("Shortcuts Manager Pro")
         self.root.geometry("1172x586")  # Default size
         self.root.minsize(1172, 586)  # Minimum size constraints
 
-        # --- iOS Styling ---
-        self.root.configure(bg="#F2F2F7")
-
         self.style = ttk.Style()
         self.style.theme_use("default")
 
@@ -99,8 +109,11 @@ class ShortcutManager:
         self.button_font = ("Helvetica Neue", 12, "bold")
         self.label_font = ("Helvetica Neue", 12)
 
-        # Configure colors based on the current theme
-        self.configure_colors()  # Call this before creating widgets
+        # --- iOS Styling ---
+        # Every theme is compiled up front; switching only reapplies a palette
+        self.theme = ThemeRegistry(self.style, (self.default_font, self.label_font, self.button_font))
+        self.theme.use(self.current_theme)  # Call this before creating widgets
+        self.theme.register(self.root, "window")
 
         # Initialize widget references to None
         self.group_name_label = None
@@ -115,9 +128,17 @@ class ShortcutManager:
         self.test_entry = None
         self.test_result_label = None
         self.sound_file_label = None
+        self.sound_enabled_var = None
+        self.buffer_time_var = None
+        self.paste_threshold_var = None
+        self.shortcut_search_var = None
+        self.group_search_var = None
         
         # Initialize variables for UI state
         self.current_group = None
+        self.search_index = None  # Until the background build finishes, searches scan
+        self.search_backlog = None  # Changes made while the search index builds
+        self.import_job = None
         self.volume_var = tk.IntVar(value=100)  # Default volume
         
         # Initialize animation properties
@@ -125,154 +146,48 @@ class ShortcutManager:
         self.animation_speed = 10  # ms between animation frames
         self.animation_steps = 10  # number of steps in animations
         
-        # Now create widgets
+        # Store edits are folded into one incremental refresh per idle cycle
+        self.pending_changes = None
+        self.store.subscribe(self.on_store_change)
+
+        # Now create widgets; only the home section is built up front
         self.create_widgets()
-        
-        # Update UI after widgets are created
-        self.update_ui()
 
-        # --- Hotkey Thread ---
-        self.hotkey_thread = threading.Thread(target=self.register_hotkey, daemon=True)
-        self.hotkey_thread.start()
-
-        # --- Typing Monitoring ---
-        self.typing_timer = None
-        self.typed_text = ""
-        self.ignore_next_space = False  # Flag to ignore spaces after expansion
+        self.drain_ui_queue()
+        self.rebuild_search_index()
 
+        self.root.after_idle(lambda: self.mark_startup("window"))
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.root.mainloop()
 
-    def configure_colors(self):
-        theme_colors = self.themes.get(self.current_theme, self.themes["light"])
-        
-        # Configure base styles
-        self.style.configure(".", 
-            background=theme_colors["bg"],
-            foreground=theme_colors["fg"],
-            font=self.default_font)
-        
-        # Configure specific widget styles
-        self.style.configure("TLabel",
-            background=theme_colors["bg"],
-            foreground=theme_colors["fg"],
-            font=self.label_font)
-            
-        self.style.configure("TButton",
-            background=theme_colors["button_bg"],
-            foreground=theme_colors["button_fg"],
-            font=self.button_font)
-            
-        self.style.configure("TEntry",
-            fieldbackground=theme_colors["field_bg"],
-            foreground=theme_colors["fg"],
-            font=self.default_font)
-            
-        self.style.configure("TCombobox",
-            fieldbackground=theme_colors["field_bg"],
-            foreground=theme_colors["fg"],
-            font=self.default_font,
-            arrowcolor=theme_colors["fg"])
-
-        # Set listbox colors
-        self.listbox_bg = theme_colors["field_bg"]
-        self.listbox_fg = theme_colors["fg"]
-        self.listbox_select_bg = theme_colors["select_bg"]
-        self.listbox_select_fg = theme_colors["select_fg"]
-
-        # Apply styles if listboxes exist
-        if hasattr(self, 'groups_listbox'):
-            self.apply_listbox_styles()
-
-    def apply_listbox_styles(self):
-        # Apply styles to listboxes
-        for listbox in [self.groups_listbox, self.group_members_listbox, self.shortcuts_listbox]:
-            listbox.config(bg=self.listbox_bg, fg=self.listbox_fg, selectbackground=self.listbox_select_bg, selectforeground=self.listbox_select_fg)
-
-    def load_data(self):
-        try:
-            with open("shortcuts.json", "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {"shortcuts": {}, "groups": [], "theme": "light", "sound_file": ""}
-
-    def save_data(self):
-        """Save without volume control"""
-        data = {
-            **self.data,
-            "sound_file": self.sound_file
-        }
-        with open("shortcuts.json", "w") as f:
-            json.dump(data, f)
-
-    def apply_theme(self):
-        # Update the theme colors
-        self.configure_colors()
-
-        # Update each widget with the current theme
-        for child in self.root.winfo_children():
-            self.update_widget_style(child)
-
-        # Refresh the UI
-        self.root.update()
-
-    def update_widget_style(self, widget):
-        widget_type = widget.winfo_class()
-
-        if widget_type == "TLabel":
-            widget.config(background=self.style.lookup("TLabel", "background"), foreground=self.style.lookup("TLabel", "foreground"))
-        elif widget_type == "TButton":
-            widget.config(background=self.style.lookup("TButton", "background"), foreground=self.style.lookup("TButton", "foreground"))
-        elif widget_type == "TEntry":
-            widget.config(background=self.style.lookup("TEntry", "fieldbackground"), foreground=self.style.lookup("TEntry", "foreground"), insertbackground=self.style.lookup("TEntry", "foreground"))
-        elif widget_type == "TCombobox":
-            widget.config(background=self.style.lookup("TCombobox", "fieldbackground"), foreground=self.style.lookup("TCombobox", "foreground"))
-        elif widget_type == "Listbox":
-            widget.config(bg=self.listbox_bg, fg=self.listbox_fg, selectbackground=self.listbox_select_bg, selectforeground=self.listbox_select_fg)
-        elif widget_type == "Text":
-            widget.config(bg=self.style.lookup("TEntry", "fieldbackground"), fg=self.style.lookup("TEntry", "foreground"), insertbackground=self.style.lookup("TEntry", "foreground"))
-        elif widget_type == "Frame":
-            widget.config(bg=self.style.lookup(".", "background"))
-
-        # Recursively update children
-        for child in widget.winfo_children():
-            self.update_widget_style(child)
-
     def create_widgets(self):
         # Navigation Bar
-        self.nav_frame = tk.Frame(self.root)
-        self.nav_frame.configure(bg=self.style.lookup(".", "background"))
+        self.nav_frame = self.theme.register(tk.Frame(self.root), "frame")
         self.nav_frame.pack(side="top", fill="x", pady=(0, 10))
 
         # Navigation Buttons
-        tk.Button(self.nav_frame, text="🏠 Home", command=lambda: self.show_section("home"), font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left", padx=5)
-        tk.Button(self.nav_frame, text="📂 Groups", command=lambda: self.show_section("groups"), font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left", padx=5)
-        tk.Button(self.nav_frame, text="⌨️ Shortcuts", command=lambda: self.show_section("shortcuts"), font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left", padx=5)
-        tk.Button(self.nav_frame, text="⚙️ Settings", command=lambda: self.show_section("settings"), font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left", padx=5)
-        tk.Button(self.nav_frame, text="🧪 Test", command=lambda: self.show_section("test"), font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left", padx=5)
+        self.theme.register(tk.Button(self.nav_frame, text="🏠 Home", command=lambda: self.show_section("home"), font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left", padx=5)
+        self.theme.register(tk.Button(self.nav_frame, text="📂 Groups", command=lambda: self.show_section("groups"), font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left", padx=5)
+        self.theme.register(tk.Button(self.nav_frame, text="⌨️ Shortcuts", command=lambda: self.show_section("shortcuts"), font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left", padx=5)
+        self.theme.register(tk.Button(self.nav_frame, text="⚙️ Settings", command=lambda: self.show_section("settings"), font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left", padx=5)
+        self.theme.register(tk.Button(self.nav_frame, text="🧪 Test", command=lambda: self.show_section("test"), font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left", padx=5)
 
         # Sections
-        self.home_frame = tk.Frame(self.root, bg=self.style.lookup(".", "background"), padx=15, pady=15)
-        self.groups_frame = tk.Frame(self.root, bg=self.style.lookup(".", "background"), padx=15, pady=15)
-        self.shortcuts_frame = tk.Frame(self.root, bg=self.style.lookup(".", "background"), padx=15, pady=15)
-        self.settings_frame = tk.Frame(self.root, bg=self.style.lookup(".", "background"), padx=15, pady=15)
-        self.test_frame = tk.Frame(self.root, bg=self.style.lookup(".", "background"), padx=15, pady=15)
-
-        self.create_home_widgets()
-        self.create_groups_widgets()
-        self.create_shortcuts_widgets()
-        self.create_settings_widgets()
-        self.create_test_widgets()
+        self.home_frame = self.theme.register(tk.Frame(self.root, padx=15, pady=15), "frame")
+        self.groups_frame = self.theme.register(tk.Frame(self.root, padx=15, pady=15), "frame")
+        self.shortcuts_frame = self.theme.register(tk.Frame(self.root, padx=15, pady=15), "frame")
+        self.settings_frame = self.theme.register(tk.Frame(self.root, padx=15, pady=15), "frame")
+        self.test_frame = self.theme.register(tk.Frame(self.root, padx=15, pady=15), "frame")
+
+        # Sections are built on their first visit (see show_section)
+        self.current_section = None
+        self.built_sections = set()
+        self.stale_sections = set()  # Built sections whose lists changed while hidden
 
         self.show_section("home")
 
@@ -289,10 +204,9 @@ class ShortcutManager:
         self.create_enhanced_input_section(input_frame)
 
         # Save button
-        tk.Button(input_frame, text="💾 Save Shortcut", command=self.save_shortcut,
-                  font=self.button_font, bg=self.style.lookup("TButton", "background"),
-                  fg=self.style.lookup("TButton", "foreground"), relief="flat",
-                  borderwidth=0, activebackground="#0051CC").pack(pady=10)
+        self.theme.register(tk.Button(input_frame, text="💾 Save Shortcut", command=self.save_shortcut,
+                                      font=self.button_font, relief="flat",
+                                      borderwidth=0, activebackground="#0051CC"), "button").pack(pady=10)
         
         # Right side - Quick Actions (30% width)
         action_frame = ttk.LabelFrame(main_container, text="Quick Actions")
@@ -301,6 +215,7 @@ class ShortcutManager:
         # Quick action buttons
         actions = [
             ("📋 Import from Clipboard", self.import_from_clipboard),
+            ("📥 Import Shortcuts", self.import_shortcuts),
             ("📊 View Statistics", self.show_statistics),
             ("🔄 Sync Settings", self.sync_settings),
             ("❓ Help", self.show_help)
@@ -322,11 +237,69 @@ class ShortcutManager:
     def show_statistics(self):
         stats_window = tk.Toplevel(self.root)
         stats_window.title("Shortcut Statistics")
-        stats_window.geometry("400x300")
+        stats_window.geometry("560x720" if self.watchdog else "560x520")
         
         ttk.Label(stats_window, text=f"Total Shortcuts: {len(self.data['shortcuts'])}").pack(pady=5)
         ttk.Label(stats_window, text=f"Total Groups: {len(self.data['groups'])}").pack(pady=5)
 
+        metrics_label = stall_label = None
+        if self.attached:
+            ttk.Label(stats_window, text="Expansion runs in the background daemon").pack(pady=5)
+        else:
+            index = self.index_builder.current
+            ttk.Label(stats_window, text=f"Match Index Generation: {index.generation}").pack(pady=5)
+            ttk.Label(stats_window, text=f"Last Index Rebuild: {index.build_time * 1000:.1f} ms").pack(pady=5)
+
+            # Engine counters and latency histograms, refreshed while the window is open
+            metrics_label = ttk.Label(stats_window, justify="left")
+            metrics_label.pack(pady=5, padx=10, fill="x")
+            ttk.Button(stats_window, text="💾 Export Metrics", command=self.export_metrics).pack(pady=5)
+
+        if self.watchdog:
+            # Slowest Tk handlers and the latest stalls
+            stall_label = ttk.Label(stats_window, justify="left")
+            stall_label.pack(pady=5, padx=10, fill="x")
+            ttk.Button(stats_window, text="💾 Export Stall Report", command=self.export_stall_report).pack(pady=5)
+
+        def refresh_metrics():
+            if not stats_window.winfo_exists():
+                return
+            if metrics_label:
+                events = self.engine.events
+                lines = [f"Key Queue Peak: {events.high_water}/{events.capacity}",
+                         f"Dropped Key Events: {events.dropped}"]
+                lines.extend(self.engine.metrics.summary_lines())
+                metrics_label.config(text="\n".join(lines))
+            if stall_label:
+                stall_label.config(text="\n".join(self.watchdog.summary_lines()))
+            stats_window.after(500, refresh_metrics)
+
+        refresh_metrics()
+
+    def export_metrics(self):
+        try:
+            filepath = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            if filepath:
+                self.engine.metrics.dump(filepath)
+                messagebox.showinfo("Info", "Metrics exported successfully!")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export metrics: {e}")
+
+    def export_stall_report(self):
+        try:
+            filepath = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            if filepath:
+                self.watchdog.dump(filepath)
+                messagebox.showinfo("Info", "Stall report exported successfully!")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export stall report: {e}")
+
     def sync_settings(self):
         messagebox.showinfo("Sync", "Settings synchronized successfully!")
 
@@ -343,6 +316,14 @@ Groups Management:
 • Export/Import groups for backup
 • Transfer shortcuts between groups
 
+Dynamic Expansions:
+• {date} / {time} - Current date and time
+• {date:%d/%m/%Y} - Any strftime format
+• {clipboard} - Current clipboard text
+• {cursor} - Where the cursor is left afterwards
+• {counter} / {counter:name} - 1, 2, 3... per session
+• {ref:shortcut} - Another shortcut's expansion
+
 Best Practices:
 • Use unique, memorable shortcuts
 • Organize related shortcuts in groups
@@ -358,89 +339,89 @@ Version: 1.0.0
 
     def create_groups_widgets(self):
         # Frame for group creation and management
-        group_management_frame = tk.Frame(self.groups_frame, bg=self.style.lookup(".", "background"))
+        group_management_frame = self.theme.register(tk.Frame(self.groups_frame), "frame")
         group_management_frame.pack(fill="x", pady=5)
 
         # Left side - Group creation
-        new_group_frame = tk.Frame(group_management_frame, bg=self.style.lookup(".", "background"))
+        new_group_frame = self.theme.register(tk.Frame(group_management_frame), "frame")
         new_group_frame.pack(side="left", fill="x", expand=True)
 
-        tk.Label(new_group_frame, text="New Group:", font=self.label_font,
-                 bg=self.style.lookup(".", "background"), fg=self.style.lookup(".", "foreground")).pack(side="left", padx=(0, 5))
+        self.theme.register(tk.Label(new_group_frame, text="New Group:", font=self.label_font), "label").pack(side="left", padx=(0, 5))
         self.new_group_entry = ttk.Entry(new_group_frame, font=self.default_font, style="TEntry")
         self.new_group_entry.pack(side="left", expand=True, fill="x", padx=(0, 5))
 
-        tk.Button(new_group_frame, text="➕ Create", command=self.create_group, font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left")
+        self.theme.register(tk.Button(new_group_frame, text="➕ Create", command=self.create_group, font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left")
+
+        # Search box; narrows both lists on every keystroke
+        group_search_frame = self.theme.register(tk.Frame(self.groups_frame), "frame")
+        group_search_frame.pack(fill="x", pady=5)
+
+        self.theme.register(tk.Label(group_search_frame, text="🔍 Search:", font=self.label_font), "label").pack(side="left", padx=(0, 5))
+        self.group_search_var = tk.StringVar()
+        ttk.Entry(group_search_frame, textvariable=self.group_search_var, font=self.default_font,
+                  style="TEntry").pack(side="left", expand=True, fill="x")
+        self.group_search_var.trace('w', lambda *args: self.apply_group_search())
 
         # Listbox for groups with enhanced styling
-        groups_frame = tk.Frame(self.groups_frame, bg=self.style.lookup(".", "background"))
+        groups_frame = self.theme.register(tk.Frame(self.groups_frame), "frame")
         groups_frame.pack(fill="both", expand=True, pady=5)
 
         # Split into two columns
-        left_column = tk.Frame(groups_frame, bg=self.style.lookup(".", "background"))
+        left_column = self.theme.register(tk.Frame(groups_frame), "frame")
         left_column.pack(side="left", fill="both", expand=True, padx=5)
         
-        right_column = tk.Frame(groups_frame, bg=self.style.lookup(".", "background"))
+        right_column = self.theme.register(tk.Frame(groups_frame), "frame")
         right_column.pack(side="left", fill="both", expand=True, padx=5)
 
         # Left column - Groups list
-        tk.Label(left_column, text="Groups:", font=self.label_font,
-                 bg=self.style.lookup(".", "background"), fg=self.style.lookup(".", "foreground")).pack(pady=5)
+        self.theme.register(tk.Label(left_column, text="Groups:", font=self.label_font), "label").pack(pady=5)
         
-        self.groups_listbox = tk.Listbox(left_column, font=self.default_font, relief="flat", borderwidth=0,
-                                         selectbackground=self.listbox_select_bg, selectforeground=self.listbox_select_fg,
-                                         bg=self.listbox_bg, fg=self.listbox_fg, activestyle='none',
-                                         exportselection=False)  # Add this line to prevent selection clearing
+        self.groups_listbox = self.theme.register(VirtualListbox(left_column, row_text=self.group_row_text,
+                                                                 font=self.default_font, relief="flat", borderwidth=0,
+                                                                 activestyle='none',
+                                                                 exportselection=False), "listbox")  # Add this line to prevent selection clearing
         self.groups_listbox.pack(fill="both", expand=True)
         self.groups_listbox.bind("<<ListboxSelect>>", self.show_group_members)
         self.groups_listbox.config(selectmode=tk.EXTENDED)  # Enable multiple selection
 
         # Delete groups button
-        tk.Button(left_column, text="🗑️ Delete Selected Groups", 
-                 command=self.delete_selected_groups,
-                 font=self.button_font,
-                 bg=self.style.lookup("TButton", "background"), 
-                 fg=self.style.lookup("TButton", "foreground"),
-                 relief="flat", borderwidth=0, 
-                 activebackground="#0051CC").pack(pady=5)
+        self.theme.register(tk.Button(left_column, text="🗑️ Delete Selected Groups", 
+                                     command=self.delete_selected_groups,
+                                     font=self.button_font,
+                                     relief="flat", borderwidth=0, 
+                                     activebackground="#0051CC"), "button").pack(pady=5)
 
         # Right column - Group members and transfer
-        tk.Label(right_column, text="Group Members:", font=self.label_font,
-                 bg=self.style.lookup(".", "background"), fg=self.style.lookup(".", "foreground")).pack(pady=5)
+        self.theme.register(tk.Label(right_column, text="Group Members:", font=self.label_font), "label").pack(pady=5)
         
-        self.group_members_listbox = tk.Listbox(right_column, font=self.default_font, relief="flat", borderwidth=0,
-                                                selectbackground=self.listbox_select_bg, selectforeground=self.listbox_select_fg,
-                                                bg=self.listbox_bg, fg=self.listbox_fg, activestyle='none',
-                                                selectmode=tk.EXTENDED, exportselection=False)  # Add exportselection=False
+        self.group_members_listbox = self.theme.register(VirtualListbox(right_column, row_text=self.member_row_text,
+                                                                        font=self.default_font, relief="flat", borderwidth=0,
+                                                                        activestyle='none',
+                                                                        selectmode=tk.EXTENDED, exportselection=False), "listbox")  # Add exportselection=False
         self.group_members_listbox.pack(fill="both", expand=True)
 
         # Transfer controls
-        transfer_frame = tk.Frame(right_column, bg=self.style.lookup(".", "background"))
+        transfer_frame = self.theme.register(tk.Frame(right_column), "frame")
         transfer_frame.pack(fill="x", pady=5)
 
-        tk.Label(transfer_frame, text="Transfer to:", font=self.label_font,
-                 bg=self.style.lookup(".", "background"), fg=self.style.lookup(".", "foreground")).pack(side="left", padx=5)
+        self.theme.register(tk.Label(transfer_frame, text="Transfer to:", font=self.label_font), "label").pack(side="left", padx=5)
         
         self.transfer_group_combobox = ttk.Combobox(transfer_frame, values=[], state="readonly", font=self.default_font,
                                                     style="TCombobox")
         self.transfer_group_combobox.pack(side="left", fill="x", expand=True, padx=5)
 
-        tk.Button(transfer_frame, text="➡️ Transfer", command=self.transfer_shortcut, font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(side="left", padx=5)
+        self.theme.register(tk.Button(transfer_frame, text="➡️ Transfer", command=self.transfer_shortcut, font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(side="left", padx=5)
 
         # Add standard group management buttons
-        tk.Button(right_column, text="🗑️ Remove from Group", command=self.remove_shortcut_from_group, font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(pady=5)
+        self.theme.register(tk.Button(right_column, text="🗑️ Remove from Group", command=self.remove_shortcut_from_group, font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(pady=5)
 
         # Add delete multiple shortcuts button
-        tk.Button(right_column, text="🗑️ Delete Selected Shortcuts", command=self.delete_shortcut_from_list,
-                  font=self.button_font, bg=self.style.lookup("TButton", "background"),
-                  fg=self.style.lookup("TButton", "foreground"), relief="flat",
-                  borderwidth=0, activebackground="#0051CC").pack(pady=5)
+        self.theme.register(tk.Button(right_column, text="🗑️ Delete Selected Shortcuts", command=self.delete_shortcut_from_list,
+                                      font=self.button_font, relief="flat",
+                                      borderwidth=0, activebackground="#0051CC"), "button").pack(pady=5)
 
     def delete_selected_groups(self):
         """Combined function for deleting one or multiple groups"""
@@ -449,26 +430,18 @@ Version: 1.0.0
             messagebox.showwarning("No Selection", "Please select groups to delete.")
             return
             
-        groups_to_delete = [
-            self.groups_listbox.get(idx).replace("📂 ", "").strip()
-            for idx in selections
-        ]
+        groups_to_delete = self.groups_listbox.selected_rows()
         
         message = "Delete group" if len(groups_to_delete) == 1 else f"Delete {len(groups_to_delete)} groups"
         if messagebox.askyesno("Confirm Delete", 
                              f"{message} and remove their shortcuts from groups?"):
-            for group in groups_to_delete:
-                # Remove group from groups list
-                if group in self.data["groups"]:
-                    self.data["groups"].remove(group)
-                
-                # Update shortcuts that were in this group
-                for shortcut in self.data["shortcuts"].values():
-                    if shortcut["group"] == group:
-                        shortcut["group"] = ""
+            # Remove groups from groups list
+            self.store.remove_groups(groups_to_delete)
             
-            self.save_data()
-            self.update_ui()
+            # Update shortcuts that were in these groups
+            self.store.set_group([shortcut for group in groups_to_delete
+                                  for shortcut in self.store.members(group)], "")
+
             messagebox.showinfo("Success", 
                               f"Deleted {len(groups_to_delete)} group{'s' if len(groups_to_delete) > 1 else ''}")
 
@@ -480,11 +453,7 @@ Version: 1.0.0
                 messagebox.showwarning("No Selection", "Please select shortcuts to transfer.")
                 return
 
-            shortcuts = []
-            for index in selections:
-                shortcut_text = self.group_members_listbox.get(index)
-                shortcut = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
-                shortcuts.append(shortcut)
+            shortcuts = self.group_members_listbox.selected_rows()
 
             # Get target group
             target_group = self.transfer_group_combobox.get()
@@ -494,12 +463,8 @@ Version: 1.0.0
                 return
 
             # Update all selected shortcuts' groups
-            for shortcut in shortcuts:
-                self.data["shortcuts"][shortcut]["group"] = target_group
-            
-            self.save_data()
-            self.update_ui()
-            self.show_group_members()
+            self.store.set_group(shortcuts, target_group)
+
             messagebox.showinfo("Success", f"{len(shortcuts)} shortcuts transferred to '{target_group}'.")
             
         except IndexError:
@@ -508,52 +473,25 @@ Version: 1.0.0
     def show_group_members(self, event=None):
         """Keep group selected and show members while maintaining shortcut selection"""
         try:
-            # Store current shortcut selections
-            selected_shortcuts = []
-            if self.group_members_listbox:
-                selected_shortcuts = [self.group_members_listbox.get(idx) for idx in self.group_members_listbox.curselection()]
-            
             selections = self.groups_listbox.curselection()
             if not selections:
                 # If no selection, keep the current group
-                if self.current_group:
-                    for i in range(self.groups_listbox.size()):
-                        if self.groups_listbox.get(i).replace("📂 ", "").strip() == self.current_group:
-                            self.groups_listbox.selection_set(i)
-                            break
+                index = self.groups_listbox.index_of(self.current_group)
+                if index is not None:
+                    self.groups_listbox.selection_set(index)
                 return
-                
-            group = self.groups_listbox.get(selections[0]).replace("📂 ", "").strip()
+
+            group = self.groups_listbox.row(selections[0])
             self.current_group = group
-            
+
             # Update transfer combobox
             available_groups = [g for g in self.data["groups"] if g != group]
             self.transfer_group_combobox["values"] = available_groups
             self.transfer_group_combobox.set("")
 
-            # Update member list while preserving selections
-            current_shortcuts = set(self.group_members_listbox.get(0, tk.END))
-            self.group_members_listbox.delete(0, tk.END)
-            
-            members = [(shortcut, details["expansion"]) 
-                      for shortcut, details in self.data["shortcuts"].items() 
-                      if details["group"] == group]
-            
-            # Insert new items
-            for shortcut, expansion in members:
-                item_text = f"🔤 {shortcut} ➔ {expansion}"
-                self.group_members_listbox.insert(tk.END, item_text)
-                # Restore selection if item was previously selected
-                if item_text in selected_shortcuts:
-                    idx = self.group_members_listbox.size() - 1
-                    self.group_members_listbox.selection_set(idx)
-            
-            # Maintain group selection
-            for i in range(self.groups_listbox.size()):
-                if self.groups_listbox.get(i).replace("📂 ", "").strip() == group:
-                    self.groups_listbox.selection_set(i)
-                    break
-                    
+            # Only the visible rows are rendered; selected members stay selected
+            self.group_members_listbox.set_rows(self.member_rows(group), keep_selection=True)
+
         except (IndexError, KeyError) as e:
             print(f"Error in show_group_members: {e}")
 
@@ -565,20 +503,40 @@ Version: 1.0.0
             
         self.root.after(duration, _insert)
 
+    def group_row_text(self, group):
+        return "📂 " + group
+
+    def member_row_text(self, shortcut):
+        return f"🔤 {shortcut} ➔ {self.data['shortcuts'][shortcut]['expansion']}"
+
+    def shortcut_row_text(self, shortcut):
+        details = self.data["shortcuts"][shortcut]
+        group_label = f"[{details['group']}]" if details['group'] else ""
+        return f"🔤 {shortcut} ➔ {details['expansion']} {group_label}"
+
     def create_shortcuts_widgets(self):
-        # Listbox for shortcuts
-        self.shortcuts_listbox = tk.Listbox(self.shortcuts_frame, font=self.default_font, relief="flat", borderwidth=0,
-                                            selectbackground="#007AFF", selectforeground="#FFFFFF",
-                                            bg=self.listbox_bg, fg=self.listbox_fg, activestyle='none')
+        # Search box; narrows the list on every keystroke
+        search_frame = self.theme.register(tk.Frame(self.shortcuts_frame), "frame")
+        search_frame.pack(fill="x", pady=5)
+
+        self.theme.register(tk.Label(search_frame, text="🔍 Search:", font=self.label_font), "label").pack(side="left", padx=(0, 5))
+        self.shortcut_search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.shortcut_search_var, font=self.default_font,
+                  style="TEntry").pack(side="left", expand=True, fill="x")
+        self.shortcut_search_var.trace('w', lambda *args: self.apply_shortcut_search())
+
+        # Listbox for shortcuts; rows are rendered from self.data as they scroll into view
+        self.shortcuts_listbox = self.theme.register(VirtualListbox(self.shortcuts_frame, row_text=self.shortcut_row_text,
+                                                                    font=self.default_font, relief="flat", borderwidth=0,
+                                                                    activestyle='none'), "listbox")
         self.shortcuts_listbox.pack(pady=5, fill="both", expand=True)
         self.shortcuts_listbox.bind("<Double-Button-1>", self.edit_shortcut)
         self.shortcuts_listbox.bind("<<ListboxSelect>>", self.prepare_delete_shortcut)
         self.shortcuts_listbox.config(selectmode=tk.EXTENDED)  # Enable multiple selection
 
         # Add a manual delete button for the selected shortcut
-        tk.Button(self.shortcuts_frame, text="🗑️ Delete Shortcut", command=self.delete_selected_shortcut, font=self.button_font,
-                  bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                  relief="flat", borderwidth=0, activebackground="#0051CC").pack(pady=10)
+        self.theme.register(tk.Button(self.shortcuts_frame, text="🗑️ Delete Shortcut", command=self.delete_selected_shortcut, font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(pady=10)
 
         # Add bulk actions frame
         bulk_actions = ttk.Frame(self.shortcuts_frame)
@@ -607,7 +565,7 @@ Version: 1.0.0
         theme_frame.pack(fill="x", padx=10, pady=5)
         
         # Create theme buttons
-        for theme_name, theme_colors in self.themes.items():
+        for theme_name in THEMES:
             ttk.Button(
                 theme_frame,
                 text=f"Switch to {theme_name.title()}", 
@@ -616,6 +574,16 @@ Version: 1.0.0
         
         # Additional settings
         self.create_additional_settings(general_frame)
+
+        # Storage backend
+        storage_frame = ttk.LabelFrame(general_frame, text="Storage")
+        storage_frame.pack(fill="x", padx=10, pady=5)
+        self.storage_label = ttk.Label(storage_frame, text=f"{self.store.name}: {self.store.path}")
+        self.storage_label.pack(side="left", padx=5)
+        self.migrate_button = ttk.Button(storage_frame, text="Migrate to SQLite", command=self.migrate_storage)
+        self.migrate_button.pack(side="right", padx=5)
+        if isinstance(self.store, SqliteStore):
+            self.migrate_button.state(["disabled"])
         
         # About section
         about_frame = ttk.LabelFrame(general_frame, text="About")
@@ -623,25 +591,51 @@ Version: 1.0.0
         ttk.Label(about_frame, text="Created by: Erfan Razmi").pack(pady=5)
         ttk.Label(about_frame, text="Version: 1.0.0").pack(pady=5)
 
+    def migrate_storage(self):
+        """One-time move from shortcuts.json to an SQLite database with per-row updates"""
+        if isinstance(self.store, SqliteStore):
+            return
+        if not messagebox.askyesno("Migrate Storage",
+                                   "Move all shortcuts into an SQLite database?\n"
+                                   f"The current file will be kept as {DATA_FILE}.migrated."):
+            return
+        try:
+            self.store = migrate_to_sqlite(self.store, DB_FILE)
+            self.data = self.store.data
+            self.store.subscribe(self.on_store_change)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to migrate shortcuts: {e}")
+            return
+        self.storage_label.config(text=f"{self.store.name}: {self.store.path}")
+        self.migrate_button.state(["disabled"])
+        messagebox.showinfo("Info", "Shortcuts migrated to SQLite successfully!")
+
     def create_test_widgets(self):
-        tk.Label(self.test_frame, text="Type Shortcut:", font=self.label_font,
-                 bg=self.style.lookup("TLabel", "background"), fg=self.style.lookup("TLabel", "foreground")).pack(pady=5)
+        self.theme.register(tk.Label(self.test_frame, text="Type Shortcut:", font=self.label_font), "label").pack(pady=5)
         self.test_entry = ttk.Entry(self.test_frame, font=self.default_font, style="TEntry")
         self.test_entry.pack(pady=5, fill="x")
         self.test_entry.bind("<KeyRelease>", self.test_shortcut)
 
-        self.test_result_label = tk.Label(self.test_frame, text="", font=self.label_font,
-                                         bg=self.style.lookup("TLabel", "background"), fg=self.style.lookup("TLabel", "foreground"))
+        self.test_result_label = self.theme.register(tk.Label(self.test_frame, text="", font=self.label_font), "label")
         self.test_result_label.pack(pady=5)
 
     def show_section(self, section):
-        """Animate section transitions"""
+        """Animate section transitions; a section is built and filled when first shown"""
         # First fade out current section
         for frame in [self.home_frame, self.groups_frame, self.shortcuts_frame, 
                      self.settings_frame, self.test_frame]:
             if frame.winfo_ismapped():
                 frame.pack_forget()
-        
+
+        self.current_section = section
+        if section not in self.built_sections:
+            self.built_sections.add(section)
+            getattr(self, f"create_{section}_widgets")()
+            self.stale_sections.add(section)
+        if section in self.stale_sections:
+            self.stale_sections.discard(section)
+            self.populate_section(section)
+
         # Show new section with fade in effect
         target_frame = getattr(self, f"{section}_frame")
         target_frame.pack(fill="both", expand=True)
@@ -654,33 +648,136 @@ Version: 1.0.0
         
         fade_in()
 
-    def update_ui(self):
-        """Update all UI elements with current data"""
-        if self.group_combobox:
+    def populate_section(self, section):
+        """Fill a section's widgets from the store"""
+        if section == "home":
             self.group_combobox["values"] = [""] + self.data["groups"]
+        elif section == "groups":
+            self.groups_listbox.set_rows(self.group_rows(), keep_selection=True)
+            if self.current_group is not None and not self.store.has_group(self.current_group):
+                self.current_group = None
+                if self.group_name_label:
+                    self.group_name_label.config(text="")
+            if self.current_group is None:
+                self.group_members_listbox.set_rows([])
+            else:
+                self.group_members_listbox.set_rows(self.member_rows(self.current_group), keep_selection=True)
+                self.transfer_group_combobox["values"] = [g for g in self.data["groups"] if g != self.current_group]
+        elif section == "shortcuts":
+            self.shortcuts_listbox.set_rows(self.shortcut_rows(), keep_selection=True)
 
-        if self.groups_listbox:
-            self.groups_listbox.delete(0, tk.END)
-            for group in self.data["groups"]:
-                self.groups_listbox.insert(tk.END, "📂 " + group)
-
-        if self.shortcuts_listbox:
-            self.shortcuts_listbox.delete(0, tk.END)
-            for shortcut, details in self.data["shortcuts"].items():
-                group_label = f"[{details['group']}]" if details['group'] else ""
-                self.shortcuts_listbox.insert(tk.END, f"🔤 {shortcut} ➔ {details['expansion']} {group_label}")
-
+    def update_ui(self):
+        """Update all UI elements with current data; hidden sections catch up when shown"""
+        self.current_group = None
         if self.group_name_label:
             self.group_name_label.config(text="")
-            
-        if self.group_members_listbox:
-            self.group_members_listbox.delete(0, tk.END)
+        self.stale_sections.update(self.built_sections)
+        self.populate_section(self.current_section)
+        self.stale_sections.discard(self.current_section)
+
+    def on_store_change(self, changes):
+        """Collect store changes; the widgets are patched once Tk is idle"""
+        if self.pending_changes is None:
+            self.pending_changes = changes
+            self.root.after_idle(self.refresh_ui)
+        else:
+            self.pending_changes.merge(changes)
+
+    def refresh_ui(self):
+        """Apply all changes since the last refresh as one minimal update"""
+        changes, self.pending_changes = self.pending_changes, None
+        if changes is None:
+            return
+        if changes.shortcuts_changed:
+            self.references.apply(changes, self.data["shortcuts"])
+            self.rebuild_index()
+            self.update_search_index(changes)
+        if self.server and (changes.shortcuts_changed or changes.groups):
+            self.server.groups = self.store.group_snapshot()
+        if changes.reset or changes.settings:
+            self.apply_settings()
+        if changes.reset:
+            self.update_ui()
+            return
+
+        if changes.groups:
+            self.group_combobox["values"] = [""] + self.data["groups"]
+
+        # Only the visible section is patched; hidden ones are refilled when shown
+        for section, refresh in (("groups", self.refresh_groups_section),
+                                 ("shortcuts", self.refresh_shortcuts_section)):
+            if section not in self.built_sections:
+                continue
+            if section == self.current_section:
+                refresh(changes)
+            elif changes.groups or changes.shortcuts_changed:
+                self.stale_sections.add(section)
+
+    def refresh_groups_section(self, changes):
+        # With a search active, any shortcut change can move rows in or out
+        group_search = bool(self.group_search_var and self.group_search_var.get().strip())
+        regroup = group_search and changes.shortcuts_changed
+        if changes.groups or regroup:
+            self.groups_listbox.set_rows(self.group_rows(), keep_selection=True)
+            if self.current_group is not None and not self.store.has_group(self.current_group):
+                self.current_group = None
+                self.group_members_listbox.set_rows([])
+
+        if self.current_group is not None:
+            if self.current_group in changes.members or regroup:
+                self.group_members_listbox.set_rows(self.member_rows(self.current_group), keep_selection=True)
+            elif changes.updated:
+                self.group_members_listbox.apply_changes(updated=changes.updated)
+            if changes.groups:
+                self.transfer_group_combobox["values"] = [g for g in self.data["groups"] if g != self.current_group]
+
+    def refresh_shortcuts_section(self, changes):
+        # Group labels are part of each row, so membership moves are updates too
+        if self.shortcut_search_var.get().strip():
+            if changes.shortcuts_changed:
+                self.shortcuts_listbox.set_rows(self.shortcut_rows(), keep_selection=True)
+        else:
+            self.shortcuts_listbox.apply_changes(changes.added, changes.removed, changes.updated)
+
+    def apply_settings(self):
+        """Adopt settings written behind the window's back, e.g. by a Replace import"""
+        # The window's own controls update these attributes before saving, so
+        # only values that differ came from elsewhere
+        data = self.data
+        theme = data.get("theme", "bitunix")
+        if theme != self.current_theme:
+            self.current_theme = theme
+            self.theme.use(theme)
+
+        buffer_clear_time = data.get("buffer_clear_time", 10000)
+        if buffer_clear_time != self.buffer_clear_time:
+            self.buffer_clear_time = buffer_clear_time
+            if self.engine:
+                self.engine.buffer_clear_time = buffer_clear_time
+            if self.buffer_time_var:
+                self.buffer_time_var.set(str(buffer_clear_time))
+
+        paste_threshold = data.get("paste_threshold", 200)
+        if paste_threshold != self.paste_threshold:
+            self.paste_threshold = paste_threshold
+            if self.engine:
+                self.engine.injector.paste_threshold = paste_threshold
+            if self.paste_threshold_var:
+                self.paste_threshold_var.set(str(paste_threshold))
+
+        sound_file = data.get("sound_file", "")
+        if sound_file != self.sound_file:
+            self.sound_file = sound_file
+            if self.engine:
+                self.engine.sound_file = sound_file
+            if self.sound_file_label:
+                self.sound_enabled_var.set(bool(sound_file))
+                self.sound_file_label.config(text=os.path.basename(sound_file) if sound_file else "No file selected")
 
     def toggle_theme(self, theme):
         self.current_theme = theme
-        self.data["theme"] = theme
-        self.save_data()
-        self.apply_theme()
+        self.store.set_setting("theme", theme)
+        self.theme.use(theme)
 
     def save_shortcut(self):
         shortcut = self.shortcut_entry.get().strip()
@@ -688,19 +785,18 @@ Version: 1.0.0
         expansion = self.expansion_entry.get("1.0", tk.END).strip()
 
         if shortcut and expansion:
-            self.data["shortcuts"][shortcut] = {"expansion": expansion, "group": group}
-            if group and group not in self.data["groups"]:
-                self.data["groups"].append(group)
-            self.save_data()
+            cycle = self.references.find_cycle(shortcut, expansion)
+            if cycle:
+                messagebox.showerror("Error", f"A shortcut can't include itself: {' → '.join(cycle)}")
+                return
+            self.store.put_shortcut(shortcut, expansion, group)
             self.clear_inputs()
-            self.update_ui()
             messagebox.showinfo("Info", "✅ Shortcut saved!")
 
     def prepare_delete_shortcut(self, event=None):
         try:
             selection = self.shortcuts_listbox.curselection()[0]
-            shortcut_text = self.shortcuts_listbox.get(selection)
-            self.selected_shortcut_for_deletion = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
+            self.selected_shortcut_for_deletion = self.shortcuts_listbox.row(selection)
         except IndexError:
             self.selected_shortcut_for_deletion = None
 
@@ -708,9 +804,9 @@ Version: 1.0.0
         # This function is called when the "Delete Shortcut" button is pressed
         if self.selected_shortcut_for_deletion:
             try:
-                del self.data["shortcuts"][self.selected_shortcut_for_deletion]
-                self.save_data()
-                self.update_ui()
+                if self.selected_shortcut_for_deletion not in self.data["shortcuts"]:
+                    raise KeyError(self.selected_shortcut_for_deletion)
+                self.store.delete_shortcuts([self.selected_shortcut_for_deletion])
                 self.selected_shortcut_for_deletion = None
             except KeyError:
                 messagebox.showerror("Error", "Shortcut not found in data.")
@@ -732,26 +828,17 @@ Version: 1.0.0
                 messagebox.showwarning("No Selection", "Please select shortcuts to delete.")
                 return
 
-            current_group = self.groups_listbox.get(group_selection[0]).replace("📂 ", "").strip()
-            shortcuts = []
-            
+            current_group = self.groups_listbox.row(group_selection[0])
+
             # Get all selected shortcuts
-            for index in selections:
-                shortcut_text = self.group_members_listbox.get(index)
-                shortcut = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
-                shortcuts.append(shortcut)
+            shortcuts = self.group_members_listbox.selected_rows()
 
             if shortcuts:
                 if messagebox.askyesno("Confirm Delete", 
                                      f"Permanently delete {len(shortcuts)} shortcuts?"):
                     # Delete all selected shortcuts
-                    for shortcut in shortcuts:
-                        if shortcut in self.data["shortcuts"]:
-                            del self.data["shortcuts"][shortcut]
-                    
-                    self.save_data()
-                    self.show_group_members()
-                    self.update_ui()
+                    self.store.delete_shortcuts(shortcuts)
+
                     messagebox.showinfo("Success", f"{len(shortcuts)} shortcuts deleted.")
 
         except Exception as e:
@@ -761,8 +848,7 @@ Version: 1.0.0
     def edit_shortcut(self, event):
         try:
             selection = self.shortcuts_listbox.curselection()[0]
-            shortcut_text = self.shortcuts_listbox.get(selection)
-            shortcut = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
+            shortcut = self.shortcuts_listbox.row(selection)
             expansion = self.data["shortcuts"][shortcut]["expansion"]
             group = self.data["shortcuts"][shortcut]["group"]
 
@@ -776,10 +862,8 @@ Version: 1.0.0
 
     def create_group(self):
         group = self.new_group_entry.get().strip()
-        if group and group not in self.data["groups"]:
-            self.data["groups"].append(group)
-            self.save_data()
-            self.update_ui()
+        if group and not self.store.has_group(group):
+            self.store.add_group(group)
             self.new_group_entry.delete(0, tk.END)
         else:
             messagebox.showwarning("Duplicate Group", "Group already exists!")
@@ -787,10 +871,9 @@ Version: 1.0.0
     def prepare_remove_shortcut_from_group(self, event=None):
         try:
             group_selection = self.groups_listbox.curselection()[0]
-            self.selected_group_for_removal = self.groups_listbox.get(group_selection).replace("📂 ", "").strip()
+            self.selected_group_for_removal = self.groups_listbox.row(group_selection)
             shortcut_selection = self.group_members_listbox.curselection()[0]
-            shortcut_text = self.group_members_listbox.get(shortcut_selection)
-            self.selected_shortcut_for_removal = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
+            self.selected_shortcut_for_removal = self.group_members_listbox.row(shortcut_selection)
         except IndexError:
             self.selected_group_for_removal = None
             self.selected_shortcut_for_removal = None
@@ -810,26 +893,17 @@ Version: 1.0.0
                 messagebox.showwarning("No Selection", "Please select shortcuts to remove.")
                 return
 
-            current_group = self.groups_listbox.get(group_selection[0]).replace("📂 ", "").strip()
-            shortcuts = []
-            
+            current_group = self.groups_listbox.row(group_selection[0])
+
             # Get all selected shortcuts
-            for index in selections:
-                shortcut_text = self.group_members_listbox.get(index)
-                shortcut = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
-                shortcuts.append(shortcut)
+            shortcuts = self.group_members_listbox.selected_rows()
 
             if shortcuts:
                 if messagebox.askyesno("Confirm Remove", 
                                      f"Remove {len(shortcuts)} shortcuts from group '{current_group}'?"):
                     # Remove all selected shortcuts from group
-                    for shortcut in shortcuts:
-                        if shortcut in self.data["shortcuts"]:
-                            self.data["shortcuts"][shortcut]["group"] = ""
-                    
-                    self.save_data()
-                    self.show_group_members()
-                    self.update_ui()
+                    self.store.set_group(shortcuts, "")
+
                     messagebox.showinfo("Success", f"{len(shortcuts)} shortcuts removed from group.")
 
         except Exception as e:
@@ -840,8 +914,7 @@ Version: 1.0.0
         try:
             # Get the selected shortcut
             shortcut_selection = self.group_members_listbox.curselection()[0]
-            shortcut_text = self.group_members_listbox.get(shortcut_selection)
-            shortcut = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
+            shortcut = self.group_members_listbox.row(shortcut_selection)
 
             # Get the available groups
             available_groups = self.data["groups"].copy()
@@ -858,9 +931,8 @@ Version: 1.0.0
             tk.Label(group_selection_window, text="Select a group:", font=self.label_font).pack(pady=5)
 
             # Listbox for available groups
-            groups_listbox = tk.Listbox(group_selection_window, font=self.default_font, relief="flat", borderwidth=0,
-                                         selectbackground=self.listbox_select_bg, selectforeground=self.listbox_select_fg,
-                                         bg=self.listbox_bg, fg=self.listbox_fg, activestyle='none')
+            groups_listbox = self.theme.register(tk.Listbox(group_selection_window, font=self.default_font, relief="flat", borderwidth=0,
+                                                             activestyle='none'), "listbox")
             for group in available_groups:
                 groups_listbox.insert(tk.END, group)
             groups_listbox.pack(pady=5, fill="both", expand=True)
@@ -873,21 +945,15 @@ Version: 1.0.0
                     selected_group = groups_listbox.get(selected_group_index)
 
                     # Update the shortcut's group
-                    self.data["shortcuts"][shortcut]["group"] = selected_group
-                    self.save_data()
-                    self.update_ui()
-
-                    # Refresh group members list
-                    self.show_group_members()
+                    self.store.set_group([shortcut], selected_group)
 
                     # Close the group selection window
                     group_selection_window.destroy()
                 except IndexError:
                     messagebox.showwarning("No Selection", "Please select a group.")
 
-            tk.Button(group_selection_window, text="Move Shortcut", command=confirm_move, font=self.button_font,
-                      bg=self.style.lookup("TButton", "background"), fg=self.style.lookup("TButton", "foreground"),
-                      relief="flat", borderwidth=0, activebackground="#0051CC").pack(pady=10)
+            self.theme.register(tk.Button(group_selection_window, text="Move Shortcut", command=confirm_move, font=self.button_font,
+                                          relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(pady=10)
 
         except IndexError:
             messagebox.showwarning("No Selection", "Please select a shortcut to move.")
@@ -897,18 +963,15 @@ Version: 1.0.0
     def delete_group(self, event=None):
         try:
             selection = self.groups_listbox.curselection()[0]
-            group = self.groups_listbox.get(selection).replace("📂 ", "").strip()
+            group = self.groups_listbox.row(selection)
 
             # Remove the group from the list of groups
-            self.data["groups"].remove(group)
+            if not self.store.has_group(group):
+                raise ValueError(group)
+            self.store.remove_groups([group])
 
             # Remove shortcuts associated with the group
-            shortcuts_to_delete = [k for k, v in self.data["shortcuts"].items() if v["group"] == group]
-            for shortcut in shortcuts_to_delete:
-                del self.data["shortcuts"][shortcut]
-
-            self.save_data()
-            self.update_ui()
+            self.store.delete_shortcuts(self.store.members(group))
         except (IndexError, ValueError):  # ValueError if the group is not in the list
             pass
 
@@ -925,27 +988,106 @@ Version: 1.0.0
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export backup: {e}")
 
-    def import_backup(self):
+    def import_shortcuts(self):
+        """Import a backup, CSV file, AutoHotkey script or espanso match file"""
+        if self.import_job and not self.import_job.done:
+            messagebox.showwarning("Import Running", "Please wait for the current import to finish.")
+            return
+        patterns = [" ".join(f"*{extension}" for extension in extensions) for label, extensions, reader in READERS]
+        filepath = filedialog.askopenfilename(
+            filetypes=[("All supported", " ".join(patterns))] +
+                      [(label, pattern) for (label, extensions, reader), pattern in zip(READERS, patterns)]
+        )
+        if not filepath:
+            return
         try:
-            filepath = filedialog.askopenfilename(
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-            )
-            if filepath:
-                with open(filepath, "r") as f:
-                    self.data = json.load(f)
-                self.save_data()
-                self.update_ui()
-                messagebox.showinfo("Info", "Backup imported successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to import backup: {e}")
+            reader_for(filepath)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.choose_import_policy(filepath)
+
+    def choose_import_policy(self, filepath):
+        """Ask how conflicts with existing shortcuts should be resolved"""
+        policy_window = tk.Toplevel(self.root)
+        policy_window.title("Import Shortcuts")
+        policy_window.geometry("460x220")
+
+        ttk.Label(policy_window, text=f"Import {os.path.basename(filepath)}:").pack(pady=5)
+        policy_var = tk.StringVar(value=MERGE_KEEP_LOCAL)
+        for policy, label in POLICIES.items():
+            ttk.Radiobutton(policy_window, text=label, value=policy, variable=policy_var).pack(anchor="w", padx=20)
+
+        def start():
+            policy_window.destroy()
+            self.start_import(filepath, policy_var.get())
+
+        self.theme.register(tk.Button(policy_window, text="📥 Start Import", command=start, font=self.button_font,
+                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button").pack(pady=10)
+
+    def start_import(self, filepath, policy):
+        """Stream the file in on a worker thread with a progress window"""
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Importing Shortcuts")
+        progress_window.geometry("520x360")
+
+        ttk.Label(progress_window, text=os.path.basename(filepath)).pack(pady=5)
+        progress_bar = ttk.Progressbar(progress_window, maximum=100, length=460)
+        progress_bar.pack(pady=5, padx=20)
+        status_label = ttk.Label(progress_window, text="Starting...", wraplength=480)
+        status_label.pack(pady=5)
+        errors_text = self.theme.register(tk.Text(progress_window, height=10, font=self.default_font, relief="flat"), "text")
+        errors_text.pack(fill="both", expand=True, padx=10, pady=5)
+        errors_text.config(state="disabled")
+
+        def status(job):
+            return (f"Imported {job.imported}, kept {job.skipped} local, {job.unchanged} unchanged, "
+                    f"{job.duplicates} duplicates, {job.conflict_count} conflicts, {job.error_count} invalid")
+
+        def update(job):
+            if progress_window.winfo_exists():
+                progress_bar["value"] = job.fraction * 100
+                status_label.config(text=status(job))
+
+        def finished(job):
+            if not progress_window.winfo_exists():
+                return
+            update(job)
+            if job.failure is not None:
+                status_label.config(text=f"Import stopped: {job.failure}\n{status(job)}")
+            elif job.cancelled:
+                status_label.config(text=f"Import cancelled. {status(job)}")
+            else:
+                status_label.config(text=f"Import finished. {status(job)}")
+            errors_text.config(state="normal")
+            for title, entries, count in (("Invalid entries", job.errors, job.error_count),
+                                          ("Conflicts", job.conflicts, job.conflict_count)):
+                if entries:
+                    errors_text.insert(tk.END, f"{title}:\n")
+                    errors_text.insert(tk.END, "\n".join(f"{entry}: {message}" for entry, message in entries))
+                    if count > len(entries):
+                        errors_text.insert(tk.END, f"\n... and {count - len(entries)} more")
+                    errors_text.insert(tk.END, "\n\n")
+            errors_text.config(state="disabled")
+            cancel_button.config(text="Close", command=progress_window.destroy)
+
+        cancel_button = self.theme.register(tk.Button(progress_window, text="Cancel", font=self.button_font,
+                                                      relief="flat", borderwidth=0, activebackground="#0051CC"), "button")
+        cancel_button.pack(pady=10)
+
+        self.import_job = ImportJob(self.store, filepath, policy, self.ui_queue.put,
+                                    on_progress=update, on_done=finished)
+        cancel_button.config(command=self.import_job.cancel)
+        self.import_job.start()
             
     def export_group(self):
         try:
             selection = self.groups_listbox.curselection()[0]
-            group = self.groups_listbox.get(selection).replace("📂 ", "").strip()
+            group = self.groups_listbox.row(selection)
 
             # Create a dictionary containing only shortcuts belonging to the selected group
-            group_data = {"shortcuts": {k: v for k, v in self.data["shortcuts"].items() if v["group"] == group}}
+            shortcuts = self.data["shortcuts"]
+            group_data = {"shortcuts": {k: shortcuts[k] for k in self.store.members(group)}}
 
             filepath = filedialog.asksaveasfilename(
                 defaultextension=".json",
@@ -961,7 +1103,9 @@ Version: 1.0.0
     def test_shortcut(self, event=None):
         shortcut = self.test_entry.get().strip()
         if shortcut in self.data["shortcuts"]:
-            expansion = self.data["shortcuts"][shortcut]["expansion"]
+            # Counters show the value the next expansion will use
+            context = self.engine.templates if self.engine else TemplateContext(self.backend.get_clipboard)
+            expansion = preview(self.references.resolve(shortcut), context)
             self.test_result_label.config(text=f"Result: {expansion}")
         else:
             self.test_result_label.config(text="Shortcut not found")
@@ -971,108 +1115,135 @@ Version: 1.0.0
         self.expansion_entry.delete("1.0", tk.END)
         self.group_combobox.set("")
 
-    def register_hotkey(self):
-        keyboard.on_press(self.on_key_press)
-
-    def on_key_press(self, event):
-        """Improved key press handling without key blocking"""
-        try:
-            # Ignore modifier keys
-            if event.name in ['shift', 'ctrl', 'alt', 'windows', 'tab']:
-                return
-
-            print(f"Key pressed: {event.name}, Buffer: {self.typed_text}")
-
-            if event.name == 'space':
-                if self.typed_text:
-                    self.check_for_shortcut(force_check=True)
-                self.typed_text = ""
-            elif event.name == 'enter':
-                if self.typed_text:
-                    self.check_for_shortcut(force_check=True)
-                self.typed_text = ""
-            elif event.name == 'backspace':
-                if self.typed_text:
-                    self.typed_text = self.typed_text[:-1]
-            elif len(event.name) == 1:  # Only single characters
-                self.typed_text += event.name
-                
-                # Cancel existing timer
-                if self.typing_timer is not None:
-                    self.typing_timer.cancel()
-                
-                # Set timer for checking shortcuts
-                self.typing_timer = threading.Timer(0.3, self.check_for_shortcut)
-                self.typing_timer.start()
-                
-                # Set timer to clear buffer using user setting
-                self.root.after(self.buffer_clear_time, self.clear_typed_buffer)
+    # --- Search ---
+    def search_shortcuts(self, query):
+        """Triggers matching every term of query, from the index once it is built"""
+        if self.search_index is None:
+            return scan(self.data["shortcuts"], query)
+        return self.search_index.query(query)
+
+    def shortcut_rows(self):
+        query = self.shortcut_search_var.get() if self.shortcut_search_var else ""
+        if query.strip():
+            return self.search_shortcuts(query)
+        return list(self.data["shortcuts"])
+
+    def group_rows(self):
+        """Groups whose name matches the group search or that hold a matching shortcut"""
+        query = self.group_search_var.get() if self.group_search_var else ""
+        if not query.strip():
+            return list(self.data["groups"])
+        terms = search_terms(query)
+        shortcuts = self.data["shortcuts"]
+        matching = {shortcuts[trigger]["group"] for trigger in self.search_shortcuts(query)}
+        return [group for group in self.data["groups"]
+                if group in matching or all(term in group.lower() for term in terms)]
+
+    def member_rows(self, group):
+        members = self.store.members(group)
+        query = self.group_search_var.get() if self.group_search_var else ""
+        if not query.strip():
+            return members
+        matches = set(self.search_shortcuts(query))
+        return [trigger for trigger in members if trigger in matches]
+
+    def apply_shortcut_search(self):
+        self.shortcuts_listbox.set_rows(self.shortcut_rows(), keep_selection=True)
+
+    def apply_group_search(self):
+        self.groups_listbox.set_rows(self.group_rows(), keep_selection=True)
+        if self.current_group is not None:
+            self.group_members_listbox.set_rows(self.member_rows(self.current_group), keep_selection=True)
+
+    def rebuild_search_index(self):
+        """Build a fresh search index off the Tk thread; edits made meanwhile are replayed"""
+        if self.search_backlog is not None:
+            return  # A build is already running and will pick up the backlog
+        self.search_backlog = ChangeSet()
+        snapshot = list(self.data["shortcuts"].items())
+
+        def build():
+            index = SearchIndex.build(snapshot)
+            self.ui_queue.put(lambda: self.install_search_index(index))
+
+        threading.Thread(target=build, name="search-index-builder", daemon=True).start()
+
+    def install_search_index(self, index):
+        backlog, self.search_backlog = self.search_backlog, None
+        if backlog.reset:
+            self.rebuild_search_index()  # Everything was replaced during the build
+            return
+        self.apply_search_changes(index, backlog)
+        self.search_index = index
+
+    def update_search_index(self, changes):
+        if self.search_backlog is not None:
+            self.search_backlog.merge(changes)
+        if changes.reset:
+            self.search_index = None
+            self.rebuild_search_index()
+        elif self.search_index is not None:
+            self.apply_search_changes(self.search_index, changes)
+            if self.search_index.needs_rebuild:
+                self.rebuild_search_index()
+
+    def apply_search_changes(self, index, changes):
+        shortcuts = self.data["shortcuts"]
+        for trigger in changes.removed:
+            index.remove(trigger)
+        for keys in (changes.added, changes.updated):
+            for trigger in keys:
+                if trigger in shortcuts:
+                    index.add(trigger, shortcuts[trigger])
+                else:
+                    index.remove(trigger)
+
+    def rebuild_index(self):
+        """Hand a snapshot of the shortcuts to the background index builder"""
+        if self.index_builder is None:
+            return  # The daemon rebuilds from the store on disk
+        # The graph already flattened what changed; this only copies its dict
+        self.index_builder.request_rebuild(self.references.flattened())
 
-        except Exception as e:
-            print(f"Error in key press handler: {e}")
+    def register_hotkey(self):
+        # The hook only timestamps and enqueues; the engine thread does the rest
+        keyboard.on_press(self.engine.on_key_press)
+        self.mark_startup("hook")
 
-    def clear_typed_buffer(self):
-        """Clear the typing buffer after delay"""
-        if self.typed_text:
-            print(f"Clearing buffer: {self.typed_text}")
-            self.typed_text = ""
+    def mark_startup(self, milestone):
+        """Record time since launch for a startup milestone; shown in the statistics"""
+        if self.engine is None:
+            return
+        seconds = time.perf_counter() - STARTED_AT
+        self.engine.metrics.mark(milestone, seconds)
+        if DEBUG:
+            print(f"Startup: {milestone} after {seconds * 1000:.1f}ms")
 
-    def check_for_shortcut(self, force_check=False):
-        """Improved shortcut checking without key blocking"""
+    def drain_ui_queue(self):
+        """Run callbacks posted by background threads on the Tk thread"""
         try:
-            if not self.typed_text:
-                return
-
-            print(f"Checking text: '{self.typed_text}'")
-            
-            # Sort shortcuts by length (longest first)
-            sorted_shortcuts = sorted(self.data['shortcuts'].items(), 
-                                   key=lambda x: len(x[0]), 
-                                   reverse=True)
-            
-            # Check for shortcuts
-            for shortcut, details in sorted_shortcuts:
-                if self.typed_text.endswith(shortcut):
-                    # Check if shortcut is at start of text or preceded by space
-                    shortcut_start = len(self.typed_text) - len(shortcut)
-                    if shortcut_start == 0 or self.typed_text[shortcut_start - 1] == ' ':
-                        print(f"Match found! Shortcut: '{shortcut}'")
-                        expansion = details["expansion"]
-                        chars_to_remove = len(shortcut)
-                        
-                        try:
-                            # Remove only the shortcut characters
-                            for _ in range(chars_to_remove):
-                                keyboard.press_and_release('backspace')
-                                time.sleep(0.01)
-                            
-                            # Type the expansion directly
-                            keyboard.write(expansion)
-                            
-                            # Play sound
-                            self.play_sound()
-                            
-                            # Clear buffer and block next space
-                            self.typed_text = ""
-                            self.ignore_next_space = False
-                            
-                            print("Expansion completed successfully")
-                            return True
-                            
-                        except Exception as e:
-                            print(f"Error during expansion: {e}")
-                            return False
-
-            # Clear buffer if forced
-            if force_check:
-                self.typed_text = ""
-
-        except Exception as e:
-            print(f"Error in shortcut checker: {e}")
-            return False
+            while True:
+                callback = self.ui_queue.get_nowait()
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Error in UI callback: {e}")
+        except queue.Empty:
+            pass
+        self.root.after(50, self.drain_ui_queue)
 
     def on_closing(self):
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
+            if self.import_job:
+                self.import_job.cancel()
+            if self.engine:
+                self.engine.stop()
+            if self.server:
+                self.server.stop()
+            self.lock.release()
+            self.store.close()
+            if METRICS_FILE and self.engine:
+                self.engine.metrics.dump(METRICS_FILE)
             self.root.destroy()
 
     def choose_sound(self):
@@ -1081,28 +1252,8 @@ Version: 1.0.0
             filetypes=[("WAV files", "*.wav"), ("All files", "*.*")]
         )
         if filepath:
-            self.data["sound_file"] = filepath
+            self.store.set_setting("sound_file", filepath)
             self.sound_file_label.config(text=os.path.basename(filepath))
-            self.save_data()
-
-    def play_sound(self, sound_name="SystemExclamation"):
-        """Updated play_sound with volume control"""
-        sound_file = self.data.get("sound_file")
-        volume = self.volume_var.get() if hasattr(self, 'volume_var') else 100
-        
-        if self.sound_enabled_var.get() and sound_file and os.path.exists(sound_file):
-            try:
-                # Convert volume to system volume (0-65535)
-                system_volume = int((volume / 100) * 65535)
-                winsound.PlaySound(sound_file, 
-                                 winsound.SND_FILENAME | 
-                                 winsound.SND_ASYNC | 
-                                 winsound.SND_NODEFAULT)
-            except Exception as e:
-                print(f"Error playing custom sound: {e}")
-                self.play_default_sound()
-        else:
-            self.play_default_sound()
 
     def delete_selected_shortcuts(self):
         """Delete multiple shortcuts from either shortcuts tab or groups tab"""
@@ -1121,21 +1272,12 @@ Version: 1.0.0
             messagebox.showwarning("No Selection", "Please select shortcuts to delete.")
             return
             
-        shortcuts_to_delete = [
-            source_listbox.get(idx).split(" ➔ ")[0].replace("🔤 ", "").strip()
-            for idx in selections
-        ]
+        shortcuts_to_delete = source_listbox.selected_rows()
         
         if messagebox.askyesno("Confirm Delete", 
                               f"Permanently delete {len(selections)} shortcuts?"):
-            for shortcut in shortcuts_to_delete:
-                if shortcut in self.data["shortcuts"]:
-                    del self.data["shortcuts"][shortcut]
-            
-            self.save_data()
-            self.update_ui()
-            if self.groups_frame.winfo_ismapped():
-                self.show_group_members()
+            self.store.delete_shortcuts(shortcuts_to_delete)
+
             messagebox.showinfo("Success", f"{len(selections)} shortcuts deleted.")
 
     def create_additional_settings(self, parent):
@@ -1188,28 +1330,53 @@ Version: 1.0.0
             try:
                 time = max(1000, int(self.buffer_time_var.get()))
                 self.buffer_clear_time = time
-                self.data["buffer_clear_time"] = time
-                self.save_data()
+                if self.engine:
+                    self.engine.buffer_clear_time = time
+                self.store.set_setting("buffer_clear_time", time)
             except ValueError:
                 self.buffer_time_var.set(str(self.buffer_clear_time))
         
         self.buffer_time_var.trace('w', update_buffer_time)
+
+        # Paste threshold setting
+        paste_frame = ttk.Frame(typing_frame)
+        paste_frame.pack(fill="x", pady=5)
+
+        ttk.Label(paste_frame, text="Paste expansions of at least (chars):").pack(side="left", padx=5)
+        self.paste_threshold_var = tk.StringVar(value=str(self.paste_threshold))
+        paste_entry = ttk.Entry(paste_frame, textvariable=self.paste_threshold_var, width=10)
+        paste_entry.pack(side="left", padx=5)
+
+        def update_paste_threshold(*args):
+            try:
+                threshold = max(0, int(self.paste_threshold_var.get()))
+                self.paste_threshold = threshold
+                if self.engine:
+                    self.engine.injector.paste_threshold = threshold
+                self.store.set_setting("paste_threshold", threshold)
+            except ValueError:
+                self.paste_threshold_var.set(str(self.paste_threshold))
+
+        self.paste_threshold_var.trace('w', update_paste_threshold)
         
         # Help text
         help_text = """Typing Buffer Settings:
 • Buffer Clear Time: How long to wait before clearing typed text (min 1000ms)
 • Longer times allow for slower typing of shortcuts
 • Shorter times may improve system responsiveness
-• Default: 10000 ms (10 seconds)"""
+• Default: 10000 ms (10 seconds)
+• Paste Threshold: Longer expansions are pasted via the clipboard in one step
+  (your clipboard is restored afterwards); 0 always types (default: 200)"""
         
         ttk.Label(typing_frame, text=help_text, wraplength=400, justify="left").pack(pady=5)
 
     def toggle_sound(self):
         if not self.sound_enabled_var.get():
             self.sound_file = ""
+            if self.engine:
+                self.engine.sound_file = ""
             self.sound_file_label.config(text="No file selected")
-            self.data["sound_file"] = ""
-            self.save_data()
+            self.store.set_setting("sound_file", "")
 
     def choose_sound_file(self):
         filepath = filedialog.askopenfilename(
@@ -1222,37 +1389,26 @@ Version: 1.0.0
         )
         if filepath:
             self.sound_file = filepath
+            if self.engine:
+                self.engine.sound_file = filepath
             self.sound_file_label.config(text=os.path.basename(filepath))
             self.sound_enabled_var.set(True)
-            self.data["sound_file"] = filepath
-            self.save_data()
+            self.store.set_setting("sound_file", filepath)
 
     def test_sound(self):
         if self.sound_enabled_var.get() and self.sound_file and os.path.exists(self.sound_file):
             try:
-                winsound.PlaySound(self.sound_file, winsound.SND_FILENAME | winsound.SND_ASYNC)
+                self.backend.play_file(self.sound_file)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not play sound file: {e}")
         else:
-            winsound.PlaySound("SystemExclamation", winsound.SND_ALIAS | winsound.SND_ASYNC)
+            self.play_default_sound()
 
     def play_sound(self):
-        if self.sound_enabled_var.get() and self.sound_file and os.path.exists(self.sound_file):
-            try:
-                winsound.PlaySound(self.sound_file, 
-                                 winsound.SND_FILENAME | winsound.SND_ASYNC)
-            except Exception as e:
-                print(f"Error playing custom sound: {e}")
-                self.play_default_sound()
-        else:
-            self.play_default_sound()
+        self.backend.play_sound(self.sound_file if self.sound_enabled_var.get() else "")
 
     def play_default_sound(self):
-        try:
-            winsound.PlaySound("SystemExclamation", 
-                             winsound.SND_ALIAS | winsound.SND_ASYNC)
-        except Exception as e:
-            print(f"Error playing system sound: {e}")
+        self.backend.play_sound()
 
     def paste_text(self, event):
         """Handle paste events in text widgets"""
@@ -1265,26 +1421,18 @@ Version: 1.0.0
 
     def create_enhanced_input_section(self, input_frame):
         """Create enhanced input section with labels and widgets"""
-        tk.Label(input_frame, text="Shortcut:", font=self.label_font,
-                bg=self.style.lookup("TLabel", "background"),
-                fg=self.style.lookup("TLabel", "foreground")).pack(pady=5)
+        self.theme.register(tk.Label(input_frame, text="Shortcut:", font=self.label_font), "label").pack(pady=5)
         self.shortcut_entry = ttk.Entry(input_frame, font=self.default_font, style="TEntry")
         self.shortcut_entry.pack(pady=5, fill="x", padx=10)
 
-        tk.Label(input_frame, text="Group:", font=self.label_font,
-                bg=self.style.lookup("TLabel", "background"),
-                fg=self.style.lookup("TLabel", "foreground")).pack(pady=5)
+        self.theme.register(tk.Label(input_frame, text="Group:", font=self.label_font), "label").pack(pady=5)
         self.group_combobox = ttk.Combobox(input_frame, values=self.data["groups"],
                                           state="readonly", font=self.default_font, style="TCombobox")
         self.group_combobox.pack(pady=5, fill="x", padx=10)
 
-        tk.Label(input_frame, text="Expansion:", font=self.label_font,
-                bg=self.style.lookup("TLabel", "background"),
-                fg=self.style.lookup("TLabel", "foreground")).pack(pady=5)
-        self.expansion_entry = tk.Text(input_frame, height=3, font=self.default_font,
-                                     relief="flat", bg=self.style.lookup("TEntry", "fieldbackground"),
-                                     fg=self.style.lookup("TEntry", "foreground"),
-                                     insertbackground=self.style.lookup("TEntry", "foreground"))
+        self.theme.register(tk.Label(input_frame, text="Expansion:", font=self.label_font), "label").pack(pady=5)
+        self.expansion_entry = self.theme.register(tk.Text(input_frame, height=3, font=self.default_font, relief="flat"),
+                                                   "text")
         self.expansion_entry.pack(pady=5, fill="both", expand=True, padx=10)
         
         # Bind paste events
@@ -1299,9 +1447,7 @@ Version: 1.0.0
             return
             
         shortcuts_to_export = {}
-        for idx in selections:
-            shortcut_text = self.shortcuts_listbox.get(idx)
-            shortcut = shortcut_text.split(" ➔ ")[0].replace("🔤 ", "").strip()
+        for shortcut in self.shortcuts_listbox.selected_rows():
             if shortcut in self.data["shortcuts"]:
                 shortcuts_to_export[shortcut] = self.data["shortcuts"][shortcut]
         
@@ -0,0 +1,539 @@
+import codecs
+import csv
+import io
+import json
+import os
+import re
+import threading
+
+# Conflict policies, keyed by the name shown in the import dialog
+REPLACE = "replace"
+MERGE_KEEP_LOCAL = "merge-keep-local"
+MERGE_PREFER_INCOMING = "merge-prefer-incoming"
+POLICIES = {
+    REPLACE: "Replace everything with the imported file",
+    MERGE_KEEP_LOCAL: "Merge, keep my version of conflicting shortcuts",
+    MERGE_PREFER_INCOMING: "Merge, take the imported version of conflicting shortcuts",
+}
+
+
+class JsonStreamReader:
+    """Pulls JSON values out of a binary file one at a time
+
+    Only the containers we walk (objects) are parsed incrementally; each
+    value inside them is decoded whole with raw_decode, which keeps memory
+    bounded by the largest single entry rather than the file.
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.consumed = 0  # Characters dropped from the front of the buffer
+
+    def _fill(self):
+        """Read another chunk; False at end of file"""
+        if self.eof:
+            return False
+        data = self.f.read(self.CHUNK_SIZE)
+        self.eof = not data
+        self.consumed += self.position
+        self.buffer = self.buffer[self.position:] + self.text_decoder.decode(data, final=self.eof)
+        self.position = 0
+        return not self.eof
+
+    def peek(self):
+        """Next non-whitespace character, or "" at end of file"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self.position += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON at character {self.consumed + e.pos}: {e.msg}")
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.position = end
+            return value
+
+    def object_keys(self):
+        """Yield each key of an object; the caller reads its value before resuming"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("Object keys must be strings")
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.position += 1
+            else:
+                self.expect("}")
+                return
+
+
+def read_backup(f):
+    """Records from a native shortcuts.json backup
+
+    Yields ("shortcut", trigger, details), ("groups", [names]) and
+    ("setting", key, value) tuples, one shortcut at a time.
+    """
+    reader = JsonStreamReader(f)
+    for key in reader.object_keys():
+        if key == "shortcuts":
+            for trigger in reader.object_keys():
+                yield "shortcut", trigger, reader.value()
+        elif key == "groups":
+            yield "groups", reader.value()
+        else:
+            yield "setting", key, reader.value()
+
+
+def _lines(f):
+    """Decoded lines of a binary source, streamed; f stays open for progress"""
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        yield from text
+    finally:
+        text.detach()
+
+
+CSV_COLUMNS = {
+    "trigger": ("trigger", "shortcut", "abbreviation", "abbr", "keyword"),
+    "expansion": ("expansion", "replace", "replacement", "text", "phrase", "snippet"),
+    "group": ("group", "category", "folder"),
+}
+
+
+def read_csv(f):
+    """trigger,expansion[,group] rows; a header row may name the columns in any order"""
+    rows = csv.reader(_lines(f))
+    columns = {"trigger": 0, "expansion": 1, "group": 2}
+    for number, row in enumerate(rows, 1):
+        if number == 1:
+            names = [name.strip().lower() for name in row]
+            found = {field: next((names.index(alias) for alias in aliases if alias in names), None)
+                     for field, aliases in CSV_COLUMNS.items()}
+            if found["trigger"] is not None and found["expansion"] is not None:
+                columns = found
+                continue
+        if not row or not any(row):
+            continue
+        cells = {field: row[index] if index is not None and index < len(row) else ""
+                 for field, index in columns.items()}
+        yield "shortcut", cells["trigger"], {"expansion": cells["expansion"], "group": cells["group"]}
+
+
+AHK_HOTSTRING = re.compile(r"^\s*:([^:\s]*):(.+?)::(.*)$")
+AHK_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}  # Any other `x is x itself
+AHK_KEYS = {"{enter}": "\n", "{tab}": "\t", "{space}": " "}
+
+
+def _ahk_text(text, raw):
+    """Hotstring replacement text as it would be typed; raw (R/T) text keeps key names"""
+    text = re.sub(r"`(.)", lambda m: AHK_ESCAPES.get(m.group(1), m.group(1)), text)
+    if not raw:
+        text = re.sub(r"\{(?:enter|tab|space)\}", lambda m: AHK_KEYS[m.group(0).lower()], text, flags=re.IGNORECASE)
+    return text
+
+
+def read_ahk(f):
+    """AutoHotkey ::trigger::expansion hotstrings, including ( ... ) continuation sections"""
+    lines = _lines(f)
+    pushed_back = []  # A line read ahead that the outer loop still has to see
+    while True:
+        line = pushed_back.pop() if pushed_back else next(lines, None)
+        if line is None:
+            break
+        line = line.rstrip("\r\n")
+        match = AHK_HOTSTRING.match(line)
+        if not match:
+            continue  # Comments, directives and regular hotkeys
+        options, trigger, text = match.groups()
+        options = options.upper()
+        if "X" in options:
+            yield "shortcut", trigger, ValueError("runs code instead of typing text")
+            continue
+        if not text.strip():
+            # ::trigger:: followed by a continuation section on the next lines
+            block = []
+            for line in lines:
+                stripped = line.strip()
+                if not block and not stripped.startswith("("):
+                    pushed_back.append(line)
+                    break
+                if stripped.startswith(")"):
+                    break
+                block.append(line.rstrip("\r\n"))
+            if not block:
+                # ::trigger:: with the action on the following lines is code
+                yield "shortcut", trigger, ValueError("runs code instead of typing text")
+                continue
+            text = "\n".join(block[1:])
+        else:
+            # Trailing comments need whitespace before the semicolon
+            text = re.sub(r"\s+;.*$", "", text)
+        yield "shortcut", trigger, {"expansion": _ahk_text(text, "R" in options or "T" in options), "group": ""}
+
+
+ESPANSO_ITEM = re.compile(r"^(\s*)-\s+(.*)$")
+ESPANSO_KEY = re.compile(r"^([A-Za-z_]+):\s*(.*)$")
+ESPANSO_UNSUPPORTED = ("vars", "form", "form_fields", "image_path", "html", "markdown")
+
+
+def _yaml_scalar(value):
+    """Plain, single- or double-quoted YAML scalar on one line"""
+    value = value.strip()
+    if value.startswith('"'):
+        end = value.rfind('"')
+        if end <= 0:
+            raise ValueError("multi-line quoted strings are not supported")
+        # YAML double-quoted escapes are a superset of JSON's; the common ones match
+        return json.loads(value[:end + 1])
+    if value.startswith("'"):
+        end = value.rfind("'")
+        if end <= 0:
+            raise ValueError("multi-line quoted strings are not supported")
+        return value[1:end].replace("''", "'")
+    return re.sub(r"\s+#.*$", "", value)
+
+
+def _yaml_list(value):
+    value = value.strip()
+    if not (value.startswith("[") and value.endswith("]")):
+        raise ValueError("triggers must be a [flow, list]")
+    items = re.findall(r'"(?:[^"\\]|\\.)*"|\'(?:[^\']|\'\')*\'|[^,\s][^,]*', value[1:-1])
+    return [_yaml_scalar(item) for item in items]
+
+
+def _espanso_entries(item):
+    """Shortcut records for one parsed match item"""
+    label = item.get("trigger") or item.get("triggers") or "(no trigger)"
+    try:
+        label = _yaml_scalar(label)
+        unsupported = [key for key in ESPANSO_UNSUPPORTED if key in item]
+        if unsupported:
+            raise ValueError(f"uses unsupported espanso features: {', '.join(unsupported)}")
+        if "replace" not in item:
+            raise ValueError("has no replace text")
+        expansion = item["replace"]
+        if isinstance(expansion, str) and not item.get("replace_block"):
+            expansion = _yaml_scalar(expansion)
+        if "triggers" in item:
+            triggers = _yaml_list(item["triggers"])
+        else:
+            triggers = [_yaml_scalar(item.get("trigger", ""))]
+    except ValueError as e:
+        return [("shortcut", str(label), e)]
+    return [("shortcut", trigger, {"expansion": expansion, "group": ""}) for trigger in triggers]
+
+
+def read_espanso(f):
+    """Matches from an espanso YAML file
+
+    Handles the subset match files are written in: items under matches: with
+    trigger/triggers and replace, where replace is a one-line scalar or a
+    | / > block. Items using vars, forms or images are reported, not imported.
+    """
+    item = None
+    item_indent = key_indent = 0
+    block = None  # (key, style, lines) while reading a block scalar
+    in_matches = False
+
+    def finish_block():
+        key, style, lines = block
+        indent = min((len(line) - len(line.lstrip()) for line in lines if line.strip()), default=0)
+        lines = [line[indent:] for line in lines]
+        while lines and not lines[-1].strip():
+            lines.pop()
+        if style.startswith(">"):
+            text = " ".join(line.strip() for line in lines)
+        else:
+            text = "\n".join(lines)
+        if not style.endswith("-"):
+            text += "\n"  # Clip: keep one final line break
+        item[key] = text
+        item["replace_block"] = True
+
+    for line in _lines(f):
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if block is not None:
+            if not stripped or indent > key_indent:
+                block[2].append(line)
+                continue
+            finish_block()
+            block = None
+        if not stripped or stripped.startswith("#"):
+            continue
+        if indent == 0:
+            if item is not None:
+                yield from _espanso_entries(item)
+                item = None
+            in_matches = stripped.startswith("matches:")
+            continue
+        if not in_matches:
+            continue
+        match = ESPANSO_ITEM.match(line)
+        if match and (item is None or indent <= item_indent):
+            if item is not None:
+                yield from _espanso_entries(item)
+            item, item_indent = {}, indent
+            key_indent = indent + 2
+            line = match.group(2)
+        elif item is None or indent != key_indent:
+            continue  # Nested under a key we do not read, e.g. vars
+        else:
+            line = stripped
+        match = ESPANSO_KEY.match(line.strip())
+        if not match:
+            continue
+        key, value = match.groups()
+        if value.strip() in ("|", "|-", ">", ">-", "|+", ">+"):
+            block = (key, value.strip().replace("+", ""), [])
+        else:
+            item[key] = value
+    if block is not None:
+        finish_block()
+    if item is not None:
+        yield from _espanso_entries(item)
+
+
+# Pluggable source formats: (label, file extensions, reader). A reader takes a
+# binary file and yields ("shortcut", trigger, details or ValueError),
+# ("groups", [names]) and ("setting", key, value) records.
+READERS = []
+
+
+def register_reader(label, extensions, reader):
+    READERS.append((label, tuple(extension.lower() for extension in extensions), reader))
+
+
+def reader_for(path):
+    extension = os.path.splitext(path)[1].lower()
+    for label, extensions, reader in READERS:
+        if extension in extensions:
+            return reader
+    raise ValueError(f"Unsupported file type: {extension or path}")
+
+
+register_reader("Shortcut backups", (".json",), read_backup)
+register_reader("CSV files", (".csv",), read_csv)
+register_reader("AutoHotkey scripts", (".ahk",), read_ahk)
+register_reader("espanso match files", (".yml", ".yaml"), read_espanso)
+
+
+def validate_shortcut(trigger, details):
+    """Normalized (trigger, details) or ValueError describing what is wrong"""
+    if isinstance(details, ValueError):
+        raise details  # The reader already knows why this entry is unusable
+    if not isinstance(trigger, str) or not trigger.strip():
+        raise ValueError("trigger must be a non-empty string")
+    if not isinstance(details, dict):
+        raise ValueError("entry must be an object with an expansion")
+    expansion = details.get("expansion")
+    if not isinstance(expansion, str) or not expansion.strip():
+        raise ValueError("expansion must be a non-empty string")
+    group = details.get("group") or ""
+    if not isinstance(group, str):
+        raise ValueError("group must be a string")
+    return trigger.strip(), {"expansion": expansion.strip(), "group": group.strip()}
+
+
+class ImportJob:
+    """Streams records from a reader into the store without blocking the UI
+
+    Parsing, validation and de-duplication run on a worker thread. Validated
+    shortcuts are handed to the UI thread in batches through post(), where
+    the conflict policy is applied against the live data and each batch is
+    committed as one change. At most two batches are in flight, so a fast
+    parser cannot flood the UI queue. Cancelling keeps the batches already
+    committed.
+
+    A trigger repeated in the source keeps its first definition; repeats with
+    a different expansion are reported as conflicts, as are local shortcuts
+    that the import kept or overwrote with a different expansion.
+    """
+
+    BATCH_SIZE = 500
+    MAX_ERRORS = 1000  # Error messages kept for the report; all are counted
+
+    def __init__(self, store, path, policy, post, on_progress=None, on_done=None, reader=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown import policy: {policy}")
+        self.store = store
+        self.path = path
+        self.policy = policy
+        self.post = post  # Runs a callback on the UI thread
+        self.on_progress = on_progress  # Called on the UI thread with the job
+        self.on_done = on_done  # Called on the UI thread with the job
+        self.reader = reader or reader_for(path)
+        self.fraction = 0.0  # Share of the source file read so far
+        self.imported = 0
+        self.skipped = 0  # Kept the local shortcut
+        self.unchanged = 0  # Identical to the local shortcut
+        self.duplicates = 0  # Repeated in the source with the same expansion
+        self.error_count = 0
+        self.errors = []  # (entry, message)
+        self.conflict_count = 0
+        self.conflicts = []  # (trigger, message)
+        self._report_lock = threading.Lock()  # Errors come from the worker, conflicts from both threads
+        self.failure = None  # Set when the whole import stopped on an error
+        self.cancelled = False
+        self.done = False
+        self._seen = {}  # Trigger -> hash of its first definition in the source
+        self._groups = []
+        self._settings = {}
+        self._slots = threading.Semaphore(2)
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="import", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def error(self, entry, message):
+        with self._report_lock:
+            self.error_count += 1
+            if len(self.errors) < self.MAX_ERRORS:
+                self.errors.append((entry, message))
+
+    def conflict(self, trigger, message):
+        with self._report_lock:
+            self.conflict_count += 1
+            if len(self.conflicts) < self.MAX_ERRORS:
+                self.conflicts.append((trigger, message))
+
+    # --- Worker thread ---
+    def _run(self):
+        batch = {}
+        try:
+            size = os.path.getsize(self.path) or 1
+            with open(self.path, "rb") as f:
+                for number, record in enumerate(self.reader(f), 1):
+                    if self._cancel.is_set():
+                        break
+                    kind = record[0]
+                    if kind == "shortcut":
+                        try:
+                            trigger, details = validate_shortcut(record[1], record[2])
+                        except ValueError as e:
+                            self.error(record[1] if isinstance(record[1], str) and record[1] else f"#{number}", str(e))
+                            continue
+                        fingerprint = hash((details["expansion"], details["group"]))
+                        first = self._seen.get(trigger)
+                        if first is not None:
+                            if first == fingerprint:
+                                self.duplicates += 1
+                            else:
+                                self.conflict(trigger, "defined again with a different expansion; kept the first")
+                            continue
+                        self._seen[trigger] = fingerprint
+                        batch[trigger] = details
+                    elif kind == "groups":
+                        if isinstance(record[1], list):
+                            self._groups.extend(group.strip() for group in record[1]
+                                                if isinstance(group, str) and group.strip())
+                    elif kind == "setting":
+                        self._settings[record[1]] = record[2]
+                    if len(batch) >= self.BATCH_SIZE:
+                        self._send(batch, f.tell() / size)
+                        batch = {}
+                if batch and not self._cancel.is_set():
+                    self._send(batch, 1.0)
+        except Exception as e:
+            self.failure = e
+        self.post(self._finish)
+
+    def _send(self, batch, fraction):
+        # Wait for a free slot, but keep noticing a cancel while waiting
+        while not self._slots.acquire(timeout=0.1):
+            if self._cancel.is_set():
+                return
+        self.post(lambda: self._apply(batch, fraction))
+
+    # --- UI thread ---
+    def _apply(self, batch, fraction):
+        try:
+            if self._cancel.is_set():
+                return
+            shortcuts = self.store.data["shortcuts"]
+            incoming = {}
+            for trigger, details in batch.items():
+                local = shortcuts.get(trigger)
+                if local is None:
+                    incoming[trigger] = details
+                elif local["expansion"] == details["expansion"] and local["group"] == details["group"]:
+                    self.unchanged += 1
+                elif self.policy == MERGE_KEEP_LOCAL:
+                    self.skipped += 1
+                    if local["expansion"] != details["expansion"]:
+                        self.conflict(trigger, "differs from your shortcut; kept yours")
+                else:
+                    incoming[trigger] = details
+                    if local["expansion"] != details["expansion"]:
+                        self.conflict(trigger, "differs from your shortcut; replaced it")
+            if incoming:
+                self.store.put_shortcuts(incoming)
+            self.imported += len(incoming)
+            self.fraction = fraction
+            if self.on_progress:
+                self.on_progress(self)
+        except Exception as e:
+            self.failure = e
+            self._cancel.set()
+        finally:
+            self._slots.release()
+
+    def _finish(self):
+        self.cancelled = self._cancel.is_set() and self.failure is None
+        if self.failure is None and not self.cancelled:
+            try:
+                for group in self._groups:
+                    if not self.store.has_group(group):
+                        self.store.add_group(group)
+                if self.policy == REPLACE:
+                    # Only now, with the whole source read, is it safe to drop local entries
+                    stale = [trigger for trigger in self.store.data["shortcuts"] if trigger not in self._seen]
+                    if stale:
+                        self.store.delete_shortcuts(stale)
+                    keep = set(self._groups) | set(self.store.group_members)
+                    dropped = [group for group in self.store.data["groups"] if group not in keep]
+                    if dropped:
+                        self.store.remove_groups(dropped)
+                    for key, value in self._settings.items():
+                        self.store.set_setting(key, value)
+                self.fraction = 1.0
+            except Exception as e:
+                self.failure = e
+        self.done = True
+        if self.on_done:
+            self.on_done(self)
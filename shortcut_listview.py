@@ -0,0 +1,326 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+class VirtualListbox(tk.Listbox):
+    """Listbox that only materializes the visible rows plus a small overscan
+
+    Rows are keys into the data model and row_text(key) renders one on
+    demand, so a 100k-row list costs a Python list of keys rather than 100k
+    Tcl strings. Selection is kept per row index so it survives scrolling.
+    Like tkinter's ScrolledText, the widget sits in self.frame next to its
+    scrollbar and geometry methods are forwarded to the frame.
+    """
+
+    OVERSCAN = 20  # Rows rendered above and below the viewport
+    WHEEL_ROWS = 4  # Rows per mouse wheel notch
+
+    def __init__(self, master=None, row_text=str, **kw):
+        self.frame = tk.Frame(master, bg=kw.get("bg"))
+        self.vbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.vbar.pack(side="right", fill="y")
+
+        # Another widget taking the X selection must not clear ours
+        kw.setdefault("exportselection", False)
+        super().__init__(self.frame, **kw)
+        self.pack(side="left", fill="both", expand=True)
+
+        # Copy geometry methods of self.frame without overriding Listbox methods
+        listbox_methods = vars(tk.Listbox).keys()
+        methods = vars(tk.Pack).keys() | vars(tk.Grid).keys() | vars(tk.Place).keys()
+        for method in methods.difference(listbox_methods):
+            if method[0] != "_" and method not in ("config", "configure"):
+                setattr(self, method, getattr(self.frame, method))
+
+        self.row_text = row_text
+        self.rows = []  # Row index -> key in the data model
+        self._positions = None  # Key -> row index, built on first lookup
+        self.selected = set()  # Row indices, including rows not rendered right now
+        self.anchor = 0  # Fixed end of shift-selections
+        self.active = 0  # Row moved by the arrow keys
+        self.top = 0  # First row in the viewport
+        self.visible = 1  # Rows that fit in the viewport
+        self.window_start = 0  # Rendered rows are rows[window_start:window_end]
+        self.window_end = 0
+
+        # Our handlers run before the widget's own bindings and the Listbox
+        # class bindings, which only know about the rendered rows
+        tag = "VirtualListbox" + str(self)
+        self.bindtags((tag,) + self.bindtags())
+        for sequence, handler in (
+                ("<Button-1>", self._on_click),
+                ("<Control-Button-1>", self._on_control_click),
+                ("<Shift-Button-1>", self._on_shift_click),
+                ("<Double-Button-1>", self._on_double_click),
+                ("<B1-Motion>", self._on_drag),
+                ("<MouseWheel>", self._on_wheel),
+                ("<Button-4>", self._on_wheel),
+                ("<Button-5>", self._on_wheel),
+                ("<Up>", lambda e: self._on_arrow(-1, False)),
+                ("<Down>", lambda e: self._on_arrow(1, False)),
+                ("<Shift-Up>", lambda e: self._on_arrow(-1, True)),
+                ("<Shift-Down>", lambda e: self._on_arrow(1, True)),
+                ("<Prior>", lambda e: self._on_arrow(-self.visible, False)),
+                ("<Next>", lambda e: self._on_arrow(self.visible, False)),
+                ("<Home>", lambda e: self._on_arrow(-len(self.rows), False)),
+                ("<End>", lambda e: self._on_arrow(len(self.rows), False)),
+                ("<Control-a>", self._on_select_all),
+                ("<Control-slash>", self._on_select_all),
+                ("<<ListboxSelect>>", self._sync_selection),
+                ("<Configure>", self._on_configure)):
+            self.bind_class(tag, sequence, handler)
+
+    # --- Data ---
+    def configure(self, cnf=None, **kw):
+        # The frame shows beside the scrollbar, so it follows the list's background
+        background = kw.get("bg", kw.get("background"))
+        if background is not None:
+            self.frame.configure(bg=background)
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def set_rows(self, rows, keep_selection=False):
+        """Show rows (keys into the model); optionally keep selected keys selected"""
+        if keep_selection:
+            selected_keys = {self.rows[index] for index in self.selected}
+            self.selected = {index for index, row in enumerate(rows) if row in selected_keys}
+        else:
+            self.selected = set()
+            self.anchor = self.active = 0
+        self.rows = rows
+        self._positions = None
+        self.top = self._clamp_top(self.top)
+        self._render()
+
+    def apply_changes(self, added=(), removed=(), updated=()):
+        """Patch the row list in place; only re-renders if the viewport is affected"""
+        if removed or added:
+            selected_keys = {self.rows[index] for index in self.selected}
+            if removed:
+                self.rows = [row for row in self.rows if row not in removed]
+            self.rows.extend(added)
+            self._positions = None
+            self.selected = {index for index, row in enumerate(self.rows) if row in selected_keys}
+            self.top = self._clamp_top(self.top)
+            self._render()
+        elif any(row in updated for row in self.rows[self.window_start:self.window_end]):
+            self._render()
+
+    def row(self, index):
+        """Key of the row at index"""
+        return self.rows[index]
+
+    def selected_rows(self):
+        """Keys of the selected rows, top to bottom"""
+        rows = self.rows
+        return [rows[index] for index in sorted(self.selected)]
+
+    def index_of(self, key):
+        """Row index of key, or None if it is not listed"""
+        if self._positions is None:
+            self._positions = {row: index for index, row in enumerate(self.rows)}
+        return self._positions.get(key)
+
+    def size(self):
+        return len(self.rows)
+
+    def get(self, first, last=None):
+        if last is None:
+            return self.row_text(self.rows[first])
+        return tuple(self.row_text(row) for row in self.rows[first:self._index(last) + 1])
+
+    # --- Selection ---
+    def curselection(self):
+        return tuple(sorted(self.selected))
+
+    def selection_includes(self, index):
+        return index in self.selected
+
+    def selection_set(self, first, last=None):
+        last = first if last is None else self._index(last)
+        self.selected.update(range(first, last + 1))
+        self._render_selection()
+
+    def selection_clear(self, first, last=None):
+        last = first if last is None else self._index(last)
+        if first <= 0 and last >= len(self.rows) - 1:
+            self.selected.clear()
+        else:
+            self.selected.difference_update(range(first, last + 1))
+        self._render_selection()
+
+    select_set = selection_set
+    select_clear = selection_clear
+    select_includes = selection_includes
+
+    def see(self, index):
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.visible:
+            self.scroll_to(index - self.visible + 1)
+
+    # --- Viewport ---
+    def scroll_to(self, top):
+        top = self._clamp_top(top)
+        if top == self.top and self.window_end:
+            return
+        self.top = top
+        in_window = self.window_start <= top and (top + self.visible <= self.window_end
+                                                  or self.window_end == len(self.rows))
+        if in_window:
+            self._place()  # Still inside the overscan, no need to re-render
+        else:
+            self._render()
+
+    def _clamp_top(self, top):
+        return max(0, min(top, len(self.rows) - self.visible))
+
+    def _index(self, index):
+        return len(self.rows) - 1 if index == tk.END else int(index)
+
+    def _row_height(self):
+        linespace = tkfont.Font(font=self.cget("font")).metrics("linespace")
+        return linespace + 1 + 2 * int(self.cget("selectborderwidth"))
+
+    def _render(self):
+        start = max(0, self.top - self.OVERSCAN)
+        end = min(len(self.rows), self.top + self.visible + self.OVERSCAN)
+        tk.Listbox.delete(self, 0, tk.END)
+        if end > start:
+            tk.Listbox.insert(self, tk.END, *[self.row_text(row) for row in self.rows[start:end]])
+        self.window_start, self.window_end = start, end
+        self._render_selection()
+        self._place()
+
+    def _render_selection(self):
+        tk.Listbox.selection_clear(self, 0, tk.END)
+        selected = self.selected
+        for index in range(self.window_start, self.window_end):
+            if index in selected:
+                tk.Listbox.selection_set(self, index - self.window_start)
+
+    def _place(self):
+        tk.Listbox.yview(self, self.top - self.window_start)
+        count = len(self.rows)
+        if count:
+            self.vbar.set(self.top / count, min(1.0, (self.top + self.visible) / count))
+        else:
+            self.vbar.set(0.0, 1.0)
+
+    # --- Event handlers ---
+    def _row_at(self, y):
+        if not self.window_end:
+            return None
+        return min(self.window_start + tk.Listbox.nearest(self, y), len(self.rows) - 1)
+
+    def _changed(self):
+        self._render_selection()
+        self.event_generate("<<ListboxSelect>>")
+        return "break"
+
+    def _extended(self):
+        return self.cget("selectmode") in (tk.EXTENDED, tk.MULTIPLE)
+
+    def _on_click(self, event):
+        index = self._row_at(event.y)
+        if self.cget("state") == tk.DISABLED or index is None:
+            return "break"
+        self.focus_set()
+        if self.cget("selectmode") == tk.MULTIPLE:
+            self.selected.symmetric_difference_update({index})
+        else:
+            self.selected = {index}
+        self.anchor = self.active = index
+        return self._changed()
+
+    def _on_control_click(self, event):
+        if not self._extended():
+            return self._on_click(event)
+        index = self._row_at(event.y)
+        if index is None:
+            return "break"
+        self.selected.symmetric_difference_update({index})
+        self.anchor = self.active = index
+        return self._changed()
+
+    def _on_shift_click(self, event):
+        if not self._extended():
+            return self._on_click(event)
+        index = self._row_at(event.y)
+        if index is None:
+            return "break"
+        self.selected = set(range(min(self.anchor, index), max(self.anchor, index) + 1))
+        self.active = index
+        return self._changed()
+
+    def _on_double_click(self, event):
+        # Select like a click, then let the widget's own double-click binding run
+        self._on_click(event)
+
+    def _on_drag(self, event):
+        if not self.window_end:
+            return "break"
+        if event.y < 0:
+            self.scroll_to(self.top - 1)
+        elif event.y > self.winfo_height():
+            self.scroll_to(self.top + 1)
+        index = self._row_at(max(0, min(event.y, self.winfo_height())))
+        if self._extended():
+            self.selected = set(range(min(self.anchor, index), max(self.anchor, index) + 1))
+        else:
+            self.selected = {index}
+        self.active = index
+        return self._changed()
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            notches = -1
+        elif event.num == 5:
+            notches = 1
+        elif abs(event.delta) >= 120:
+            notches = -event.delta // 120  # Windows reports multiples of 120
+        else:
+            notches = -event.delta  # macOS reports small deltas
+        self.scroll_to(self.top + notches * self.WHEEL_ROWS)
+        return "break"
+
+    def _on_arrow(self, step, extend):
+        if not self.rows:
+            return "break"
+        self.active = max(0, min(self.active + step, len(self.rows) - 1))
+        if extend and self._extended():
+            self.selected = set(range(min(self.anchor, self.active), max(self.anchor, self.active) + 1))
+        else:
+            self.selected = {self.active}
+            self.anchor = self.active
+        self.see(self.active)
+        return self._changed()
+
+    def _on_select_all(self, event):
+        if self._extended():
+            self.selected = set(range(len(self.rows)))
+            return self._changed()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            rows = amount * self.visible if args[2] == "pages" else amount
+            self.scroll_to(self.top + rows)
+
+    def _sync_selection(self, event=None):
+        # Picks up selection changes made by anything other than our handlers
+        self.selected.difference_update(range(self.window_start, self.window_end))
+        self.selected.update(self.window_start + index for index in tk.Listbox.curselection(self))
+
+    def _on_configure(self, event=None):
+        border = 2 * (int(self.cget("borderwidth")) + int(self.cget("highlightthickness")))
+        visible = max(1, (self.winfo_height() - border) // self._row_height())
+        if visible != self.visible:
+            self.visible = visible
+            self.top = self._clamp_top(self.top)
+            self._render()
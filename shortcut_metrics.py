@@ -0,0 +1,115 @@
+import bisect
+import json
+import time
+
+# Upper bucket bounds in microseconds, roughly 1-2-5 log spaced from 1 us to 1 s
+BUCKET_BOUNDS_US = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500,
+    1000, 2000, 5000, 10000, 20000, 50000,
+    100000, 200000, 500000, 1000000,
+)
+
+# Stages of the keypress -> match -> injection path, in display order
+STAGES = (
+    ("hook", "Hook callback"),
+    ("queue", "Queue wait"),
+    ("debounce", "Debounce wait"),
+    ("match", "Match"),
+    ("render", "Template render"),
+    ("backspace", "Backspace"),
+    ("write", "Write/paste"),
+    ("expansion", "Key to expansion"),
+)
+
+# One-off startup milestones, measured from launch, in the order they happen
+MILESTONES = (
+    ("hook", "hook armed"),
+    ("index", "index ready"),
+    ("window", "window ready"),
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; recording is one bisect and a few adds"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_US) + 1)  # Last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = seconds * 1e6
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_US, micros)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, fraction):
+        """Upper bound (us) of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_US, self.counts):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_us": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+            "p999_us": self.percentile(0.999),
+            "max_us": round(self.max, 2),
+            "buckets": dict(zip([str(bound) for bound in BUCKET_BOUNDS_US] + ["inf"], self.counts)),
+        }
+
+
+class Metrics:
+    """Latency histograms and counters for the expansion path"""
+
+    def __init__(self):
+        # Each stage is only recorded from one thread, so plain adds are enough
+        self.histograms = {name: Histogram() for name, _ in STAGES}
+        self.counters = {"keys": 0, "checks": 0, "expansions": 0}
+        self.started = time.time()
+        self.milestones = {}  # Milestone -> seconds since launch
+
+    def mark(self, milestone, seconds):
+        # Only the first time counts, e.g. the first index build after launch
+        self.milestones.setdefault(milestone, seconds)
+
+    def record(self, stage, seconds):
+        self.histograms[stage].record(seconds)
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def report(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "counters": dict(self.counters),
+            "startup_ms": {name: round(seconds * 1000, 1) for name, seconds in self.milestones.items()},
+            "histograms": {name: histogram.as_dict() for name, histogram in self.histograms.items()},
+        }
+
+    def summary_lines(self):
+        """Human readable one-liners for the statistics window"""
+        lines = [", ".join(f"{name}: {value}" for name, value in self.counters.items())]
+        if self.milestones:
+            lines.append("Startup: " + ", ".join(f"{label} {self.milestones[name] * 1000:.0f}ms"
+                                                 for name, label in MILESTONES if name in self.milestones))
+        for name, label in STAGES:
+            histogram = self.histograms[name]
+            lines.append(f"{label}: n={histogram.count} p50≤{histogram.percentile(0.5):g}µs "
+                         f"p99≤{histogram.percentile(0.99):g}µs max={histogram.max:.0f}µs")
+        return lines
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
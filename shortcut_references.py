@@ -0,0 +1,157 @@
+import re
+
+# {ref:trigger} is replaced by that shortcut's expansion before the index is built
+REFERENCE = re.compile(r"\{ref:([^{}\n]+)\}")
+
+
+def references(text):
+    """Triggers an expansion embeds, in order of first use"""
+    if "{ref:" not in text:
+        return ()
+    return tuple(dict.fromkeys(REFERENCE.findall(text)))
+
+
+class ReferenceGraph:
+    """Which shortcuts embed which, with every expansion kept flattened
+
+    Changing or deleting a shortcut flattens it again along with every
+    shortcut that embeds it, directly or through others; the rest are not
+    looked at. References to a trigger that does not exist are left as
+    typed until it is created.
+    """
+
+    def __init__(self, expansions=None):
+        self.expansions = {}  # Trigger -> expansion as saved
+        self.uses = {}  # Trigger -> triggers its expansion references
+        self.used_by = {}  # Trigger -> triggers referencing it, existing or not
+        self._flat = {}  # Trigger -> flattened expansion, for every trigger
+        if expansions:
+            self.reset(expansions)
+
+    def reset(self, expansions):
+        self.expansions.clear()
+        self.uses.clear()
+        self.used_by.clear()
+        self._flat.clear()
+        for trigger, text in expansions.items():
+            self._link(trigger, text)
+        # Everything is linked first, so no reference is flattened before its target exists
+        for trigger in self.expansions:
+            self.resolve(trigger)
+
+    def apply(self, changes, shortcuts):
+        """Follow a store ChangeSet; shortcuts is the store's trigger -> details dict"""
+        if changes.reset:
+            self.reset({trigger: details["expansion"] for trigger, details in shortcuts.items()})
+            return
+        for trigger in changes.removed:
+            self.remove(trigger)
+        for keys in (changes.added, changes.updated):
+            for trigger in keys:
+                if trigger in shortcuts:
+                    self.set(trigger, shortcuts[trigger]["expansion"])
+
+    def set(self, trigger, text):
+        if self.expansions.get(trigger) == text:
+            return  # e.g. only its group changed
+        self._unlink(trigger)
+        self._link(trigger, text)
+        self._reflatten(self.invalidate(trigger))
+
+    def remove(self, trigger):
+        if trigger in self.expansions:
+            self._unlink(trigger)
+            del self.expansions[trigger]
+            self._reflatten(self.invalidate(trigger))
+
+    def _link(self, trigger, text):
+        self.expansions[trigger] = text
+        uses = references(text)
+        if uses:
+            self.uses[trigger] = uses
+            for used in uses:
+                self.used_by.setdefault(used, set()).add(trigger)
+
+    def _unlink(self, trigger):
+        for used in self.uses.pop(trigger, ()):
+            users = self.used_by[used]
+            users.discard(trigger)
+            if not users:
+                del self.used_by[used]
+
+    def invalidate(self, trigger):
+        """Forget the flattened text of trigger and of everything embedding it
+
+        Returns the triggers forgotten.
+        """
+        stack = [trigger]
+        seen = {trigger}
+        while stack:
+            current = stack.pop()
+            self._flat.pop(current, None)
+            for user in self.used_by.get(current, ()):
+                if user not in seen:
+                    seen.add(user)
+                    stack.append(user)
+        return seen
+
+    def _reflatten(self, triggers):
+        for trigger in triggers:
+            if trigger in self.expansions:
+                self.resolve(trigger)
+
+    def find_cycle(self, trigger, text):
+        """The reference path if saving text for trigger would embed itself, else None"""
+        # Depth-first from what the new text uses, through the saved graph
+        stack = [(used, (trigger, used)) for used in references(text)]
+        seen = set()
+        while stack:
+            current, path = stack.pop()
+            if current == trigger:
+                return list(path)
+            if current in seen:
+                continue
+            seen.add(current)
+            for used in self.uses.get(current, ()):
+                stack.append((used, path + (used,)))
+        return None
+
+    def resolve(self, trigger):
+        """trigger's expansion with every reference replaced"""
+        flat = self._flat.get(trigger)
+        if flat is not None:
+            return flat
+        if trigger not in self.uses:
+            flat = self._flat[trigger] = self.expansions[trigger]
+            return flat
+
+        # Depth-first with an explicit stack, since chains of references can
+        # run deeper than the recursion limit. Saving rejects cycles, but a
+        # file edited by hand may still have one; the reference that closes
+        # it (one to a trigger still on the stack) is left as typed
+        expansions, uses, memo = self.expansions, self.uses, self._flat
+        stack = [trigger]
+        active = {trigger}
+
+        def replace(match):
+            used = match.group(1)
+            if used not in expansions or used in active:
+                return match.group(0)
+            return memo[used] if used in memo else expansions[used]
+
+        while stack:
+            current = stack[-1]
+            for used in uses[current]:
+                if used in uses and used not in memo and used not in active:
+                    stack.append(used)  # Flatten what it embeds first
+                    active.add(used)
+                    break
+            else:
+                memo[current] = REFERENCE.sub(replace, expansions[current])
+                stack.pop()
+                active.discard(current)
+        return memo[trigger]
+
+    def flattened(self):
+        """A trigger -> flattened expansion copy of every shortcut, for the match index"""
+        return self._flat.copy()
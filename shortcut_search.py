@@ -0,0 +1,145 @@
+from array import array
+from bisect import bisect_left
+
+GRAM = 3
+# Triggers and group names also get every character and character pair
+# indexed, so one- and two-character queries are answered from postings
+SHORT_GRAMS = (1, 2)
+
+
+def search_terms(query):
+    """Lowercased whitespace-separated terms; a row must contain all of them"""
+    return query.lower().split()
+
+
+def document(trigger, details):
+    """Searchable text of one shortcut: trigger, expansion and group"""
+    return f"{trigger}\n{details['expansion']}\n{details.get('group', '')}".lower()
+
+
+def heading(trigger, details):
+    """What one- and two-character queries are matched against"""
+    return f"{trigger}\n{details.get('group', '')}".lower()
+
+
+def scan(shortcuts, query):
+    """Linear search, used while the index is being built"""
+    terms = search_terms(query)
+    short = all(len(term) < GRAM for term in terms)
+    text_of = heading if short else document
+    return [trigger for trigger, details in shortcuts.items()
+            if all(term in text_of(trigger, details) for term in terms)]
+
+
+def intersect(lists):
+    """Ids present in every ascending id array, in ascending order"""
+    lists = sorted(lists, key=len)
+    candidates = lists[0]
+    for ids in lists[1:]:
+        if not candidates:
+            break
+        count = len(ids)
+        if count > 16 * len(candidates):
+            # Few candidates against a long list: bisect for each one
+            matched = []
+            for doc_id in candidates:
+                position = bisect_left(ids, doc_id)
+                if position < count and ids[position] == doc_id:
+                    matched.append(doc_id)
+            candidates = matched
+        else:
+            members = set(ids)
+            candidates = [doc_id for doc_id in candidates if doc_id in members]
+    return candidates
+
+
+class SearchIndex:
+    """Trigram inverted index over shortcut triggers, expansions and group names
+
+    Each shortcut gets an integer document id and every trigram maps to an
+    array of ids in ascending order, so postings cost four bytes per entry.
+    Triggers and group names get a second index of single characters and
+    character pairs for the first keystrokes of a search. Updating a
+    shortcut retires its id and appends a new one; retired ids stay in the
+    arrays until the index is rebuilt.
+    """
+
+    def __init__(self):
+        self.postings = {}  # Trigram -> array of document ids, ascending
+        self.head_postings = {}  # Character or pair in trigger/group -> array of ids
+        self.keys = []  # Document id -> trigger, None once retired
+        self.texts = []  # Document id -> lowercased document text
+        self.heads = []  # Document id -> lowercased trigger and group
+        self.ids = {}  # Trigger -> current document id
+        self.retired = 0
+
+    @classmethod
+    def build(cls, shortcuts):
+        """Index (trigger, details) pairs; meant to run off the Tk thread"""
+        index = cls()
+        for trigger, details in shortcuts:
+            index.add(trigger, details)
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def needs_rebuild(self):
+        # Retired ids only cost memory and bisect steps; rebuild once they dominate
+        return self.retired > max(len(self.ids), 10000)
+
+    def add(self, trigger, details):
+        if trigger in self.ids:
+            self.remove(trigger)
+        doc_id = len(self.keys)
+        text = document(trigger, details)
+        self.keys.append(trigger)
+        self.texts.append(text)
+        self.ids[trigger] = doc_id
+        self._post(self.postings, {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}, doc_id)
+        head = heading(trigger, details)
+        self.heads.append(head)
+        self._post(self.head_postings, {head[i:i + size] for size in SHORT_GRAMS
+                                        for i in range(len(head) - size + 1)}, doc_id)
+
+    @staticmethod
+    def _post(postings, grams, doc_id):
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = ids = array("I")
+            ids.append(doc_id)
+
+    def remove(self, trigger):
+        doc_id = self.ids.pop(trigger, None)
+        if doc_id is not None:
+            self.keys[doc_id] = None
+            self.texts[doc_id] = self.heads[doc_id] = ""
+            self.retired += 1
+
+    def query(self, query):
+        """Triggers whose text contains every term, in the order they were indexed"""
+        terms = search_terms(query)
+        if not terms:
+            return [key for key in self.keys if key is not None]
+        grams = {term[i:i + GRAM] for term in terms for i in range(len(term) - GRAM + 1)}
+        keys = self.keys
+        if not grams:
+            # Too short for trigrams: match triggers and group names only.
+            # Each term has an exact posting list; walk the shortest and test
+            # the other terms against the short heading text
+            lists = sorted(((self.head_postings.get(term, ()), term) for term in set(terms)),
+                           key=lambda entry: len(entry[0]))
+            candidates = lists[0][0]
+            heads = self.heads  # Retired ids have an empty heading and drop out here
+            for _, term in lists[1:]:
+                candidates = [doc_id for doc_id in candidates if term in heads[doc_id]]
+            return [keys[doc_id] for doc_id in candidates if keys[doc_id] is not None]
+
+        candidates = intersect([self.postings.get(gram, ()) for gram in grams])
+        # A single trigram term is answered exactly by its posting list
+        texts = self.texts
+        exact = len(terms) == 1 and len(terms[0]) == GRAM
+        return [keys[doc_id] for doc_id in candidates
+                if keys[doc_id] is not None and (exact or all(term in texts[doc_id] for term in terms))]
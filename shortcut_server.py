@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import re
+import socket
+import stat
+import threading
+
+from shortcut_template import render
+
+# When set, other tools can query and expand shortcuts over this UNIX socket
+SOCKET_PATH = os.environ.get("SHORTCUT_EXPANDER_SOCKET")
+MAX_LINE = 1 << 20  # Longest request line in bytes
+PREFIX_LIMIT = 50  # Triggers returned by a prefix query unless it asks for another count
+MAX_PREFIX_LIMIT = 1000  # Most triggers one prefix query may ask for
+WHITESPACE = re.compile(r"(\s+)")
+
+
+class ShortcutServer:
+    """Line-delimited JSON API for editor plugins and scripts
+
+    Each request is one JSON array on its own line and gets one line back,
+    ["ok", result] or ["error", message]. Requests on a connection are
+    answered in order, so clients may pipeline as many as they like.
+
+        ["lookup", trigger]          expansion with {ref:} resolved, placeholders
+                                     unrendered; null if there is none
+        ["prefix", text, limit]      sorted triggers starting with text, 1-1000
+        ["expand", text]             text with every whole-word trigger expanded
+        ["group", name]              triggers in a group; without a name, the groups
+
+    Answers come from the match index the keyboard hook uses and a group
+    snapshot its owner publishes, never the disk.
+    """
+
+    def __init__(self, index_builder, templates, path=SOCKET_PATH):
+        self.index_builder = index_builder
+        self.templates = templates  # The engine's, so counters match typed expansions
+        self.path = path
+        # Group -> tuple of triggers; the owner replaces it whole after every change
+        self.groups = {}
+        self.requests = 0
+        self._writers = set()  # One per connected client
+        self.loop = None
+        self.server = None
+        self._started = threading.Event()
+        self._thread = None
+
+    def start(self, timeout=5.0):
+        """Listen on a background thread; True once the socket accepts clients"""
+        if not hasattr(socket, "AF_UNIX"):
+            print("Error starting socket API: UNIX sockets are not supported here")
+            return False
+        self._thread = threading.Thread(target=self._run, name="socket-api", daemon=True)
+        self._thread.start()
+        self._started.wait(timeout)
+        return self.server is not None
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(1.0)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(self._listen())
+        except OSError as e:
+            print(f"Error starting socket API: {e}")
+            return
+        finally:
+            self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            # Hang up on open connections and let their handlers see the EOF
+            for writer in list(self._writers):
+                writer.close()
+            clients = asyncio.all_tasks(self.loop)
+            self.loop.run_until_complete(asyncio.gather(*clients, return_exceptions=True))
+            self.loop.close()
+            self._unlink()
+
+    async def _listen(self):
+        # A socket nobody answers on was left behind by a crash; take it over
+        if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+            probe = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(self.path)
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+            else:
+                raise OSError(f"{self.path} is in use by another shortcut expander")
+            finally:
+                probe.close()
+        server = await asyncio.start_unix_server(self._serve, self.path, limit=MAX_LINE)
+        os.chmod(self.path, 0o600)  # Expansions can hold anything; only our user may ask
+        return server
+
+    def _unlink(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    @property
+    def clients(self):
+        return len(self._writers)
+
+    async def _serve(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Longer than MAX_LINE; the stream can't be resynced
+                    writer.write(self.encode(["error", f"request over {MAX_LINE} bytes"]))
+                    break
+                if not line:
+                    break
+                writer.write(self.respond(line))
+                # Returns at once until the client stops reading its answers
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    def encode(reply):
+        return (json.dumps(reply, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+    def respond(self, line):
+        """The encoded answer to one request line"""
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, list) or not request or not isinstance(request[0], str):
+                raise ValueError("a request is a JSON array starting with an operation")
+            operation = self.OPERATIONS.get(request[0])
+            if operation is None:
+                raise ValueError(f"unknown operation {request[0]!r}")
+            try:
+                result = operation(self, self.index_builder.current, *request[1:])
+            except TypeError:
+                raise ValueError(f"wrong arguments for {request[0]}")
+            return self.encode(["ok", result])
+        except ValueError as e:
+            return self.encode(["error", str(e)])
+        except Exception as e:
+            print(f"Error in socket API: {e}")
+            return self.encode(["error", "internal error"])
+
+    # --- Operations; each reads one index snapshot, which is never mutated ---
+    def lookup(self, index, trigger):
+        expansion = index.lookup(trigger)
+        if expansion is None or expansion.__class__ is str:
+            return expansion
+        return expansion.text  # References flattened, placeholders not rendered
+
+    def prefix(self, index, text, limit=PREFIX_LIMIT):
+        if not isinstance(text, str):
+            raise TypeError(text)
+        if type(limit) is not int or not 0 < limit <= MAX_PREFIX_LIMIT:
+            raise ValueError(f"limit must be a whole number from 1 to {MAX_PREFIX_LIMIT}")
+        return index.complete(text, limit)
+
+    def expand(self, index, text):
+        # Even slots are words, odd ones the whitespace between them
+        pieces = WHITESPACE.split(text)
+        for i in range(0, len(pieces), 2):
+            expansion = index.lookup(pieces[i]) if pieces[i] else None
+            if expansion is not None:
+                pieces[i] = render(expansion, self.templates)[0]
+        return "".join(pieces)
+
+    def group(self, index, name=None):
+        groups = self.groups
+        if name is None:
+            return list(groups)
+        return list(groups.get(name, ()))
+
+    OPERATIONS = {"lookup": lookup, "prefix": prefix, "expand": expand, "group": group}
@@ -0,0 +1,711 @@
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+
+def atomic_write(path, text):
+    """Replace path with text so a crash leaves either the old or the new file"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def dumps_by_entry(data):
+    """The same text as json.dumps(data), built one shortcut at a time
+
+    One json.dumps call over a large dictionary keeps the GIL until it
+    returns, freezing the UI thread even though no lock is held; between
+    entries the interpreter can switch threads.
+    """
+    parts = []
+    for key, value in data.items():
+        if key == "shortcuts":
+            text = "{" + ", ".join(f"{json.dumps(trigger)}: {json.dumps(details)}"
+                                   for trigger, details in value.items()) + "}"
+        else:
+            text = json.dumps(value)
+        parts.append(f"{json.dumps(key)}: {text}")
+    return "{" + ", ".join(parts) + "}"
+
+
+class WriteBehindWriter:
+    """Coalesces bursts of saves into one atomic write on a background thread"""
+
+    def __init__(self, path, serialize, quiet_period=0.5, after_write=None):
+        self.path = path
+        self.serialize = serialize  # Returns the full file contents as text
+        self.quiet_period = quiet_period  # Seconds without edits before writing
+        self.after_write = after_write  # Called once the new file is in place
+        self.writes = 0
+        self.last_write_time = 0.0
+        self._dirty_at = None
+        self._running = True
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        with self._condition:
+            self._dirty_at = time.monotonic()
+            self._condition.notify()
+
+    def flush(self):
+        """Write now if anything is pending; used on shutdown"""
+        with self._condition:
+            dirty, self._dirty_at = self._dirty_at is not None, None
+        if dirty:
+            self._write()
+
+    def close(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._dirty_at is None:
+                    self._condition.wait()
+                # Every new edit restarts the quiet period
+                while self._running and self._dirty_at is not None:
+                    remaining = self._dirty_at + self.quiet_period - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._running:
+                    return
+                if self._dirty_at is None:  # Flushed while we were waiting
+                    continue
+                self._dirty_at = None
+            self._write()
+
+    def _write(self):
+        with self._write_lock:
+            started = time.perf_counter()
+            try:
+                atomic_write(self.path, self.serialize())
+            except Exception as e:
+                print(f"Error saving {self.path}: {e}")
+                return
+            self.writes += 1
+            self.last_write_time = time.perf_counter() - started
+            if self.after_write:
+                self.after_write()
+
+
+class JournalAppender:
+    """Appends journal records on a background thread with one fsync per burst
+
+    Records queued while a write is in progress go out together in the
+    next one, so a burst of edits (e.g. a setting dragged through many
+    values) costs the editing thread nothing and the disk one sync.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+        self.size = self.file.tell()  # Bytes in the journal, including queued records
+        self.syncs = 0
+        self._pending = []
+        self._running = True
+        self._condition = threading.Condition()
+        self._io_lock = threading.Lock()  # Keeps records in order across writers
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    def append(self, line):
+        with self._condition:
+            self._pending.append(line)
+            self.size += len(line)
+            self._condition.notify()
+
+    def _take(self):
+        with self._condition:
+            lines, self._pending = self._pending, []
+        return lines
+
+    def _write(self, lines):
+        if lines:
+            self.file.write("".join(lines))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.syncs += 1
+
+    def sync(self):
+        """Write and fsync every record appended so far"""
+        with self._io_lock:
+            try:
+                self._write(self._take())
+            except OSError as e:
+                print(f"Error writing {self.path}: {e}")
+
+    def rotate(self, rotated_path):
+        """Move every record appended so far to rotated_path and start an empty journal"""
+        with self._io_lock:
+            with self._condition:
+                lines, self._pending = self._pending, []
+                self.size = 0
+            self._write(lines)
+            self.file.close()
+            if os.path.exists(rotated_path):
+                # A previous compaction never finished; keep its records too
+                with open(self.path, "r", encoding="utf-8") as src, \
+                        open(rotated_path, "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, rotated_path)
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self.sync()
+        with self._io_lock:
+            self.file.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+            self.sync()
+
+
+class ChangeSet:
+    """Which shortcuts and groups a batch of changes touched
+
+    Keys are kept in dicts used as ordered sets, so added shortcuts can be
+    appended to a list view in the order they were created. Merging keeps the
+    sets minimal: a shortcut added then deleted before anyone looked at the
+    changes simply disappears.
+    """
+
+    def __init__(self):
+        self.added = {}
+        self.removed = {}
+        self.updated = {}
+        self.members = {}  # Groups whose member set changed
+        self.groups = False  # The group list itself changed
+        self.settings = {}
+        self.reset = False  # Everything was replaced
+
+    def add(self, key):
+        if key in self.removed:
+            del self.removed[key]
+            self.updated[key] = None  # Deleted and re-created
+        else:
+            self.added[key] = None
+
+    def remove(self, key):
+        if key in self.added:
+            del self.added[key]  # Never seen outside this change set
+            return
+        self.updated.pop(key, None)
+        self.removed[key] = None
+
+    def update(self, key):
+        if key not in self.added:
+            self.updated[key] = None
+
+    def merge(self, other):
+        for key in other.removed:
+            self.remove(key)
+        for key in other.added:
+            self.add(key)
+        for key in other.updated:
+            self.update(key)
+        self.members.update(other.members)
+        self.groups = self.groups or other.groups
+        self.settings.update(other.settings)
+        self.reset = self.reset or other.reset
+
+    @property
+    def shortcuts_changed(self):
+        return bool(self.reset or self.added or self.removed or self.updated)
+
+
+def empty_data():
+    return {"shortcuts": {}, "groups": [], "theme": "light", "sound_file": ""}
+
+
+class ShortcutStore:
+    """The in-memory shortcut data; every edit goes through a change record"""
+
+    def __init__(self, data):
+        self.data = data
+        self.data.setdefault("shortcuts", {})
+        self.data.setdefault("groups", [])
+        self._reindex()
+        # Held while a change is applied and persisted, so background
+        # snapshots always see data and persisted records in step
+        self.lock = threading.Lock()
+        self.listeners = []  # Called with a ChangeSet after every commit
+
+    # --- Edits ---
+    def put_shortcut(self, trigger, expansion, group=""):
+        self.commit({"op": "put", "trigger": trigger, "expansion": expansion, "group": group})
+
+    def put_shortcuts(self, shortcuts):
+        """Add or overwrite many shortcuts ({trigger: {"expansion", "group"}}) as one change"""
+        self.commit({"op": "put_many", "shortcuts": shortcuts})
+
+    def delete_shortcuts(self, triggers):
+        self.commit({"op": "delete", "triggers": list(triggers)})
+
+    def set_group(self, triggers, group):
+        self.commit({"op": "set_group", "triggers": list(triggers), "group": group})
+
+    def add_group(self, group):
+        self.commit({"op": "add_group", "group": group})
+
+    def remove_groups(self, groups):
+        self.commit({"op": "remove_groups", "groups": list(groups)})
+
+    def set_setting(self, key, value):
+        self.commit({"op": "set", "key": key, "value": value})
+
+    def replace(self, data):
+        self.commit({"op": "replace", "data": data})
+
+    # --- Group index ---
+    def _reindex(self):
+        # Ordered group set plus group -> ordered member set (dicts keep order)
+        self.group_names = dict.fromkeys(self.data["groups"])
+        self.group_members = {}
+        for trigger, details in self.data["shortcuts"].items():
+            self._add_member(trigger, details["group"])
+
+    def _add_member(self, trigger, group):
+        if group:
+            self.group_members.setdefault(group, {})[trigger] = None
+
+    def _remove_member(self, trigger, group):
+        members = self.group_members.get(group)
+        if members is not None:
+            members.pop(trigger, None)
+            if not members:
+                del self.group_members[group]
+
+    def has_group(self, group):
+        return group in self.group_names
+
+    def members(self, group):
+        """Triggers in group, in the order they joined it"""
+        return list(self.group_members.get(group, ()))
+
+    def group_snapshot(self):
+        """Group -> tuple of members for every group, empty ones included, in list order
+
+        The copy is safe to hand to another thread.
+        """
+        snapshot = {group: tuple(self.group_members.get(group, ())) for group in self.group_names}
+        for group, members in self.group_members.items():
+            snapshot.setdefault(group, tuple(members))  # Members of a group missing from the list
+        return snapshot
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def commit(self, change):
+        changes = ChangeSet()
+        with self.lock:
+            self.apply(change, changes)
+            self.persist(change)
+        for listener in self.listeners:
+            listener(changes)
+
+    def apply(self, change, changes=None):
+        """Apply a change record to the in-memory data, noting what it touched"""
+        if changes is None:
+            changes = ChangeSet()
+        op = change["op"]
+        shortcuts, groups = self.data["shortcuts"], self.data["groups"]
+        if op == "put":
+            self._put(change["trigger"], change["expansion"], change["group"], changes)
+        elif op == "put_many":
+            for trigger, details in change["shortcuts"].items():
+                self._put(trigger, details["expansion"], details["group"], changes)
+        elif op == "delete":
+            for trigger in change["triggers"]:
+                details = shortcuts.pop(trigger, None)
+                if details is not None:
+                    self._remove_member(trigger, details["group"])
+                    changes.members[details["group"]] = None
+                    changes.remove(trigger)
+        elif op == "set_group":
+            group = change["group"]
+            for trigger in change["triggers"]:
+                if trigger in shortcuts:
+                    old_group = shortcuts[trigger]["group"]
+                    self._remove_member(trigger, old_group)
+                    changes.members[old_group] = None
+                    # A new dict, not an edit: snapshots share the old one
+                    shortcuts[trigger] = {"expansion": shortcuts[trigger]["expansion"], "group": group}
+                    self._add_member(trigger, group)
+                    changes.update(trigger)
+            changes.members[group] = None
+        elif op == "add_group":
+            if change["group"] not in self.group_names:
+                self.group_names[change["group"]] = None
+                groups.append(change["group"])
+                changes.groups = True
+        elif op == "remove_groups":
+            for group in change["groups"]:
+                self.group_names.pop(group, None)
+            groups[:] = self.group_names
+            changes.groups = True
+        elif op == "set":
+            self.data[change["key"]] = change["value"]
+            changes.settings[change["key"]] = None
+        elif op == "replace":
+            data = dict(change["data"])
+            self.data.clear()
+            self.data.update(data)
+            self.data.setdefault("shortcuts", {})
+            self.data.setdefault("groups", [])
+            self._reindex()
+            changes.reset = True
+        else:
+            raise ValueError(f"Unknown change: {op}")
+
+    def _put(self, trigger, expansion, group, changes):
+        shortcuts = self.data["shortcuts"]
+        if trigger in shortcuts:
+            old_group = shortcuts[trigger]["group"]
+            self._remove_member(trigger, old_group)
+            changes.members[old_group] = None
+            changes.update(trigger)
+        else:
+            changes.add(trigger)
+        shortcuts[trigger] = {"expansion": expansion, "group": group}
+        self._add_member(trigger, group)
+        changes.members[group] = None
+        if group and group not in self.group_names:
+            self.group_names[group] = None
+            self.data["groups"].append(group)
+            changes.groups = True
+
+    # --- Persistence, implemented by each backend ---
+    def persist(self, change):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class JsonStore(ShortcutStore):
+    """shortcuts.json snapshot plus an append-only journal of changes since it"""
+
+    name = "JSON file"
+    COMPACT_BYTES = 1 << 20  # Fold the journal into a new snapshot past this size
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".journal"
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = empty_data()
+        super().__init__(data)
+
+        # A rotated journal only survives if compaction was interrupted
+        for journal_path in (self.journal_path + ".old", self.journal_path):
+            self._replay(journal_path)
+
+        self.journal = JournalAppender(self.journal_path)
+        self.compactor = WriteBehindWriter(path, self._snapshot, after_write=self._discard_rotated_journal)
+        if self.journal.size > self.COMPACT_BYTES:
+            self.compactor.mark_dirty()
+
+    def _replay(self, journal_path):
+        try:
+            with open(journal_path, "rb+") as f:
+                good = 0
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        break  # Torn final record from a crash mid-append
+                    self.apply(change)
+                    good += len(line)
+                # Drop the torn tail so new records are not appended onto it
+                f.truncate(good)
+        except FileNotFoundError:
+            pass
+
+    def persist(self, change):
+        # O(1) per edit: one small record, written and synced off this thread
+        self.journal.append(json.dumps(change) + "\n")
+        if self.journal.size > self.COMPACT_BYTES:
+            self.compactor.mark_dirty()
+
+    def _snapshot(self):
+        # Runs on the compactor thread. Under the lock the copy and the
+        # journal rotation happen between two edits, so the rotated journal
+        # holds exactly the records the copy already contains. Records are
+        # idempotent, so replaying it after a crash before cleanup is harmless.
+        with self.lock:
+            self.journal.rotate(self.journal_path + ".old")
+            # Shallow is enough: shortcut details are replaced, never edited
+            data = dict(self.data)
+            data["shortcuts"] = dict(data["shortcuts"])
+            data["groups"] = list(data["groups"])
+        # The slow part runs while edits carry on
+        return dumps_by_entry(data)
+
+    def _discard_rotated_journal(self):
+        try:
+            os.remove(self.journal_path + ".old")
+        except FileNotFoundError:
+            pass
+
+    def flush(self):
+        self.journal.sync()
+        self.compactor.flush()
+
+    def close(self):
+        # Fold any journaled edits in so the next start loads a single file
+        if self.journal.size:
+            self.compactor.mark_dirty()
+        self.compactor.close()
+        with self.lock:
+            self.journal.close()
+
+
+class SqliteStore(ShortcutStore):
+    """One row per shortcut, so single-shortcut edits are single-row transactions"""
+
+    name = "SQLite database"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shortcuts (
+            trigger TEXT PRIMARY KEY,
+            expansion TEXT NOT NULL,
+            group_name TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS shortcuts_group_name ON shortcuts (group_name);
+        CREATE TABLE IF NOT EXISTS groups (
+            name TEXT PRIMARY KEY,
+            position INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path, initial_data=None):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+        if initial_data is not None:
+            super().__init__({})
+            self.commit({"op": "replace", "data": initial_data})
+        else:
+            super().__init__(read_sqlite(self.connection))
+
+    def _insert_groups(self, groups):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO groups (name, position) "
+            "VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM groups))",
+            [(group,) for group in groups if group])
+
+    def persist(self, change):
+        op = change["op"]
+        with self.connection:  # One transaction per change
+            if op == "put":
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO shortcuts (trigger, expansion, group_name) VALUES (?, ?, ?)",
+                    (change["trigger"], change["expansion"], change["group"]))
+                self._insert_groups([change["group"]])
+            elif op == "put_many":
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO shortcuts (trigger, expansion, group_name) VALUES (?, ?, ?)",
+                    [(trigger, details["expansion"], details["group"])
+                     for trigger, details in change["shortcuts"].items()])
+                self._insert_groups(dict.fromkeys(details["group"] for details in change["shortcuts"].values()))
+            elif op == "delete":
+                self.connection.executemany(
+                    "DELETE FROM shortcuts WHERE trigger = ?", [(trigger,) for trigger in change["triggers"]])
+            elif op == "set_group":
+                self.connection.executemany(
+                    "UPDATE shortcuts SET group_name = ? WHERE trigger = ?",
+                    [(change["group"], trigger) for trigger in change["triggers"]])
+            elif op == "add_group":
+                self._insert_groups([change["group"]])
+            elif op == "remove_groups":
+                self.connection.executemany(
+                    "DELETE FROM groups WHERE name = ?", [(group,) for group in change["groups"]])
+            elif op == "set":
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    (change["key"], json.dumps(change["value"])))
+            elif op == "replace":
+                self.connection.execute("DELETE FROM shortcuts")
+                self.connection.execute("DELETE FROM groups")
+                self.connection.execute("DELETE FROM settings")
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO shortcuts (trigger, expansion, group_name) VALUES (?, ?, ?)",
+                    [(trigger, details["expansion"], details.get("group", ""))
+                     for trigger, details in self.data["shortcuts"].items()])
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO groups (name, position) VALUES (?, ?)",
+                    [(group, position) for position, group in enumerate(self.data["groups"], 1)])
+                self.connection.executemany(
+                    "INSERT INTO settings (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in self.data.items()
+                     if key not in ("shortcuts", "groups")])
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def read_sqlite(connection):
+    """The whole data dict from a SQLite store's tables"""
+    data = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM settings")}
+    data["shortcuts"] = {
+        trigger: {"expansion": expansion, "group": group}
+        for trigger, expansion, group in connection.execute(
+            "SELECT trigger, expansion, group_name FROM shortcuts")
+    }
+    data["groups"] = [name for (name,) in connection.execute("SELECT name FROM groups ORDER BY position")]
+    return data
+
+
+class StoreFollower(ShortcutStore):
+    """Read-only copy of a store another process writes, kept current by poll()
+
+    A JSON store is followed by applying the journal records appended since
+    the last poll. A compaction, any SQLite write or a migration between the
+    two reloads everything. Nothing is ever written, so a record still being
+    appended is simply read again on the next poll.
+    """
+
+    name = "read-only copy"
+
+    def __init__(self, json_path="shortcuts.json", db_path="shortcuts.db"):
+        self.json_path = json_path
+        self.journal_path = json_path + ".journal"
+        self.db_path = db_path
+        self.signature = None
+        self.offset = 0  # Bytes of the live journal already applied
+        super().__init__(empty_data())
+        self._reload(ChangeSet())
+
+    def persist(self, change):
+        raise RuntimeError("StoreFollower is read-only")
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _signature(self):
+        # Everything except growth of the live journal means a full reload
+        if os.path.exists(self.db_path):
+            return "sqlite", self._stat(self.db_path), self._stat(self.db_path + "-wal")
+        return "json", self._stat(self.json_path), self._stat(self.journal_path + ".old")
+
+    def poll(self):
+        """ChangeSet of what changed on disk since the last poll, or None"""
+        changes = ChangeSet()
+        signature = self._signature()
+        journal = self._stat(self.journal_path) if signature[0] == "json" else None
+        if signature != self.signature or (journal is not None and journal[2] < self.offset):
+            self._reload(changes)
+            return changes
+        if journal is not None and journal[2] > self.offset:
+            self.offset = self._replay(self.journal_path, self.offset, changes)
+            if changes.shortcuts_changed or changes.groups or changes.members or changes.settings:
+                return changes
+        return None
+
+    def _reload(self, changes):
+        # The writer may compact while we read; go again until the files hold still
+        for attempt in range(5):
+            signature = self._signature()
+            if signature[0] == "sqlite":
+                uri = pathlib.Path(self.db_path).absolute().as_uri() + "?mode=ro"
+                connection = sqlite3.connect(uri, uri=True)
+                try:
+                    data = read_sqlite(connection)
+                finally:
+                    connection.close()
+            else:
+                try:
+                    with open(self.json_path, "r") as f:
+                        data = json.load(f)
+                except FileNotFoundError:
+                    data = empty_data()
+            self.apply({"op": "replace", "data": data}, changes)
+            self.offset = 0
+            if signature[0] == "json":
+                self._replay(self.journal_path + ".old", 0, changes)
+                self.offset = self._replay(self.journal_path, 0, changes)
+            if self._signature() == signature:
+                break
+        self.signature = signature
+
+    def _replay(self, journal_path, offset, changes):
+        """Apply complete records from offset on; returns the offset after the last one"""
+        try:
+            with open(journal_path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Still being appended
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        break  # Torn by a crash; the writer truncates it on its next start
+                    self.apply(change, changes)
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return offset
+
+
+def open_store(json_path="shortcuts.json", db_path="shortcuts.db", backend=None):
+    """Open the SQLite store if it exists (or is asked for), otherwise shortcuts.json"""
+    backend = backend or os.environ.get("SHORTCUT_EXPANDER_STORE")
+    if os.path.exists(db_path):
+        return SqliteStore(db_path)
+    if backend == "sqlite":
+        return migrate_to_sqlite(JsonStore(json_path), db_path)
+    return JsonStore(json_path)
+
+
+def migrate_to_sqlite(json_store, db_path):
+    """One-time copy of a JsonStore into a new SQLite database"""
+    json_store.flush()
+    store = SqliteStore(db_path, initial_data=json_store.data)
+    json_store.close()
+    # Keep the old file around, but out of the way so it is never loaded again
+    if os.path.exists(json_store.path):
+        os.replace(json_store.path, json_store.path + ".migrated")
+    if os.path.exists(json_store.journal_path):
+        os.remove(json_store.journal_path)  # Already folded in by close()
+    return store
@@ -0,0 +1,139 @@
+import re
+import threading
+import time
+
+from shortcut_backends import ClipboardUnavailable
+
+# {name} or {name:argument}; braces around anything else are left as typed
+PLACEHOLDER = re.compile(r"\{(date|time|clipboard|cursor|counter)(?::([^{}\n]*))?\}")
+DEFAULT_FORMATS = {"date": "%Y-%m-%d", "time": "%H:%M"}
+CURSOR = object()  # Part marking where the caret is left after expanding
+CURSOR_MARK = "│"  # Shown in previews where the caret will end up
+
+
+def _strftime(context, fmt, preview):
+    return time.strftime(fmt)
+
+
+def _clipboard(context, argument, preview):
+    return context.clipboard()
+
+
+def _counter(context, name, preview):
+    return str(context.counter(name, advance=not preview))
+
+
+RENDERERS = {"date": _strftime, "time": _strftime, "clipboard": _clipboard, "counter": _counter}
+
+
+class Template:
+    """An expansion split once into literal text and placeholder parts
+
+    parts holds plain strings for literal text and (renderer, argument)
+    pairs for placeholders, so rendering never looks at the source again.
+    """
+
+    __slots__ = ("text", "parts")
+
+    def __init__(self, text, parts):
+        self.text = text
+        self.parts = parts
+
+    def render(self, context, preview=False):
+        """Expanded text and how many characters before its end the caret goes"""
+        pieces = []
+        size = 0
+        cursor = None
+        for part in self.parts:
+            if part is CURSOR:
+                if cursor is None:
+                    cursor = size
+                continue
+            if part.__class__ is not str:
+                renderer, argument = part
+                part = renderer(context, argument, preview)
+            pieces.append(part)
+            size += len(part)
+        return "".join(pieces), 0 if cursor is None else size - cursor
+
+
+def compile_template(text):
+    """Parse an expansion; text without placeholders comes back as the same str"""
+    if "{" not in text:
+        return text
+    parts = []
+    position = 0
+    for match in PLACEHOLDER.finditer(text):
+        if match.start() > position:
+            parts.append(text[position:match.start()])
+        name, argument = match.groups()
+        if name == "cursor":
+            parts.append(CURSOR)
+        else:
+            parts.append((RENDERERS[name], argument or DEFAULT_FORMATS.get(name, "")))
+        position = match.end()
+    if not parts:
+        return text
+    if position < len(text):
+        parts.append(text[position:])
+    return Template(text, tuple(parts))
+
+
+def render(expansion, context, preview=False):
+    """Text to inject for a compiled expansion, and the caret offset from its end"""
+    if expansion.__class__ is str:
+        return expansion, 0
+    return expansion.render(context, preview)
+
+
+def preview(text, context):
+    """What text expands to right now, with the caret shown and no counter advanced"""
+    expanded, back = render(compile_template(text), context, preview=True)
+    if back:
+        expanded = expanded[:-back] + CURSOR_MARK + expanded[-back:]
+    return expanded
+
+
+class TemplateCache:
+    """Compiled expansions keyed by their text, kept from one index build to the next"""
+
+    def __init__(self):
+        self._compiled = {}
+
+    def compile_all(self, expansions):
+        """trigger -> text dict to trigger -> compiled; only new or edited text is parsed"""
+        previous, current = self._compiled, {}
+        compiled = {}
+        for trigger, text in expansions.items():
+            template = current.get(text)
+            if template is None:
+                template = previous.get(text)
+                if template is None:
+                    template = compile_template(text)
+                current[text] = template
+            compiled[trigger] = template
+        self._compiled = current  # Text no longer used by any shortcut is dropped
+        return compiled
+
+
+class TemplateContext:
+    """What placeholders read when rendered: the clipboard and the counters"""
+
+    def __init__(self, read_clipboard):
+        self.read_clipboard = read_clipboard  # e.g. a backend's get_clipboard
+        self.counters = {}  # Counter name -> last value handed out, for this session
+        self._counter_lock = threading.Lock()  # The engine and the socket API both expand
+
+    def clipboard(self):
+        try:
+            return self.read_clipboard() or ""
+        except ClipboardUnavailable as e:
+            print(f"Error reading clipboard for expansion: {e}")
+            return ""
+
+    def counter(self, name, advance=True):
+        with self._counter_lock:
+            value = self.counters.get(name, 0) + 1
+            if advance:
+                self.counters[name] = value
+            return value
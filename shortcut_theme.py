@@ -0,0 +1,124 @@
+import tkinter as tk
+import weakref
+
+# Colour scheme per theme, resolved once into styles and widget options below
+THEMES = {
+    "bitunix": {
+        "bg": "#F2F2F7",
+        "fg": "#000000",
+        "accent": "#b9f641",
+        "button_bg": "#b9f641",
+        "button_fg": "#000000",
+        "field_bg": "#FFFFFF",
+        "select_bg": "#b9f641",
+        "select_fg": "#000000"
+    },
+    "light": {
+        "bg": "#F2F2F7",
+        "fg": "#000000",
+        "accent": "#007AFF",
+        "button_bg": "#007AFF",
+        "button_fg": "#FFFFFF",
+        "field_bg": "#FFFFFF",
+        "select_bg": "#007AFF",
+        "select_fg": "#FFFFFF"
+    },
+    "dark": {
+        "bg": "#1C1C1E",
+        "fg": "#FFFFFF",
+        "accent": "#0A84FF",
+        "button_bg": "#333333",
+        "button_fg": "#FFFFFF",
+        "field_bg": "#333333",
+        "select_bg": "#0A84FF",
+        "select_fg": "#FFFFFF"
+    },
+    "nord": {
+        "bg": "#2E3440",
+        "fg": "#ECEFF4",
+        "accent": "#88C0D0",
+        "button_bg": "#5E81AC",
+        "button_fg": "#ECEFF4",
+        "field_bg": "#3B4252",
+        "select_bg": "#88C0D0",
+        "select_fg": "#2E3440"
+    },
+    "monokai": {
+        "bg": "#272822",
+        "fg": "#F8F8F2",
+        "accent": "#FD971F",
+        "button_bg": "#66D9EF",
+        "button_fg": "#272822",
+        "field_bg": "#3E3D32",
+        "select_bg": "#FD971F",
+        "select_fg": "#272822"
+    },
+    "solarized": {
+        "bg": "#002B36",
+        "fg": "#839496",
+        "accent": "#268BD2",
+        "button_bg": "#268BD2",
+        "button_fg": "#FDF6E3",
+        "field_bg": "#073642",
+        "select_bg": "#268BD2",
+        "select_fg": "#FDF6E3"
+    }
+}
+FALLBACK_THEME = "light"
+
+
+def compile_palette(colors, fonts):
+    """Resolve one theme into ttk style options and tk widget options per role"""
+    default_font, label_font, button_font = fonts
+    styles = {
+        ".": {"background": colors["bg"], "foreground": colors["fg"], "font": default_font},
+        "TLabel": {"background": colors["bg"], "foreground": colors["fg"], "font": label_font},
+        "TButton": {"background": colors["button_bg"], "foreground": colors["button_fg"], "font": button_font},
+        "TEntry": {"fieldbackground": colors["field_bg"], "foreground": colors["fg"], "font": default_font},
+        "TCombobox": {"fieldbackground": colors["field_bg"], "foreground": colors["fg"], "font": default_font,
+                      "arrowcolor": colors["fg"]},
+    }
+    roles = {
+        "window": {"bg": colors["bg"]},
+        "frame": {"bg": colors["bg"]},
+        "label": {"bg": colors["bg"], "fg": colors["fg"]},
+        "button": {"bg": colors["button_bg"], "fg": colors["button_fg"]},
+        "text": {"bg": colors["field_bg"], "fg": colors["fg"], "insertbackground": colors["fg"]},
+        "listbox": {"bg": colors["field_bg"], "fg": colors["fg"],
+                    "selectbackground": colors["select_bg"], "selectforeground": colors["select_fg"]},
+    }
+    return styles, roles
+
+
+class ThemeRegistry:
+    """Precompiled palettes, applied through ttk styles and a registry of tk widgets
+
+    ttk widgets follow their style. Classic tk widgets carry their colours
+    per widget, so each is registered with a role when it is created and
+    recoloured in one pass on a theme switch. Destroyed widgets drop out of
+    the registry on their own.
+    """
+
+    def __init__(self, style, fonts, themes=THEMES):
+        self.style = style
+        self.palettes = {name: compile_palette(colors, fonts) for name, colors in themes.items()}
+        self.widgets = weakref.WeakKeyDictionary()  # Widget -> role
+        self.roles = {}
+        self.name = None
+
+    def use(self, name):
+        self.name = name if name in self.palettes else FALLBACK_THEME
+        styles, self.roles = self.palettes[self.name]
+        for style_name, options in styles.items():
+            self.style.configure(style_name, **options)
+        for widget, role in list(self.widgets.items()):
+            try:
+                widget.configure(**self.roles[role])
+            except tk.TclError:
+                self.widgets.pop(widget, None)  # Destroyed, but something still holds it
+
+    def register(self, widget, role):
+        """Colour widget for role now and on every theme switch; returns widget"""
+        widget.configure(**self.roles[role])
+        self.widgets[widget] = role
+        return widget
@@ -0,0 +1,99 @@
+import json
+import time
+import tkinter
+from collections import deque
+
+
+def handler_name(func):
+    """Readable name of a Tk callback, e.g. ShortcutManager.save_shortcut"""
+    code = getattr(func, "__code__", None)
+    # after() wraps each job in a callit closure; name the job itself
+    if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+        func = func.__closure__[code.co_freevars.index("func")].cell_contents
+        code = getattr(func, "__code__", None)
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    if code is not None and "<" in name:
+        name += f" (line {code.co_firstlineno})"  # Lambdas and nested functions
+    return name
+
+
+class StallWatchdog:
+    """Times every Tk callback and after() job and keeps the ones over budget
+
+    install() swaps tkinter's CallWrapper, which every command, binding,
+    trace and after() job goes through, so it must run before the widgets
+    are created. Stalls are measured on each callback's own time: a handler
+    that calls update() is not blamed for the callbacks run inside it, which
+    are flagged in their own right.
+    """
+
+    def __init__(self, budget_ms=50.0, capacity=200):
+        self.budget_ms = budget_ms
+        self.stalls = deque(maxlen=capacity)  # Most recent stalls, oldest first
+        self.worst = {}  # Handler -> [stall count, longest ms]
+        self.calls = 0
+        self.stall_count = 0
+        self.started = time.time()
+        self._nested = []  # Per running callback: seconds spent in callbacks it ran
+
+    def install(self):
+        watchdog = self
+
+        class TimedCallWrapper(tkinter.CallWrapper):
+            def __call__(self, *args):
+                return watchdog.run(self.func, super().__call__, args)
+
+        tkinter.CallWrapper = TimedCallWrapper
+        return self
+
+    def run(self, func, call, args):
+        self._nested.append(0.0)
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            own = elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.calls += 1
+            if own * 1000 >= self.budget_ms:
+                self.flag(handler_name(func), own, elapsed)
+
+    def flag(self, name, own, elapsed):
+        self.stall_count += 1
+        self.stalls.append({
+            "time": time.strftime("%H:%M:%S"),
+            "handler": name,
+            "ms": round(own * 1000, 1),
+            "total_ms": round(elapsed * 1000, 1),  # Including callbacks it ran
+        })
+        worst = self.worst.setdefault(name, [0, 0.0])
+        worst[0] += 1
+        worst[1] = max(worst[1], own * 1000)
+
+    def report(self):
+        return {
+            "budget_ms": self.budget_ms,
+            "uptime_s": round(time.time() - self.started, 1),
+            "callbacks": self.calls,
+            "stalls": self.stall_count,
+            "handlers": {name: {"stalls": count, "max_ms": round(longest, 1)}
+                         for name, (count, longest) in self.worst.items()},
+            "recent": list(self.stalls),
+        }
+
+    def summary_lines(self, limit=5):
+        """Human readable one-liners for the statistics window"""
+        lines = [f"UI stalls over {self.budget_ms:g}ms: {self.stall_count} of {self.calls} callbacks"]
+        worst = sorted(self.worst.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        lines.extend(f"  {name}: {count}x, max {longest:.0f}ms" for name, (count, longest) in worst)
+        if self.stalls:
+            lines.append("Recent:")
+            lines.extend(f"  {stall['time']} {stall['handler']} {stall['ms']:g}ms"
+                         for stall in list(self.stalls)[-limit:])
+        return lines
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)